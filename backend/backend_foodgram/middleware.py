@@ -0,0 +1,129 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from backend_foodgram.routers import (REPLICA, SAFE_METHODS, RequestRouting,
+                                      check_shared_cache, current_routing,
+                                      pin_to_primary)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('backend_foodgram.queries')
+
+
+class QueryCounter:
+    """Обертка над выполнением SQL, считающая запросы и время в базе"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.monotonic() - start
+            self.count += 1
+
+
+class QueryCountMiddleware:
+    """
+    Считает число SQL-запросов и время работы с базой для отслеживаемых
+    представлений. Включается настройкой QUERY_COUNT_ENABLED,
+    результат пишется в лог и, при необходимости, в заголовки ответа.
+    Превышение бюджета из QUERY_BUDGETS логируется как предупреждение
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_COUNT_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.views = set(getattr(settings, 'QUERY_COUNT_VIEWS', ()))
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.headers = getattr(settings, 'QUERY_COUNT_HEADERS', False)
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with self.count_queries(counter):
+            response = self.get_response(request)
+
+        endpoint = getattr(request, 'query_count_endpoint', None)
+        if endpoint is None:
+            return response
+        if self.headers:
+            # У потоковых ответов заголовки уходят до тела,
+            # поэтому в них только запросы до начала потока
+            response['X-DB-Query-Count'] = counter.count
+            response['X-DB-Query-Time'] = round(counter.duration * 1000, 2)
+        if response.streaming and not getattr(response, 'is_async', False):
+            response.streaming_content = self.count_streaming(
+                response.streaming_content, counter, request, endpoint
+            )
+        else:
+            self.report(request, endpoint, counter)
+        return response
+
+    @staticmethod
+    def count_queries(counter):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        return stack
+
+    def count_streaming(self, content, counter, request, endpoint):
+        """Запросы, выполняемые при чтении потокового тела, тоже считаются"""
+        with self.count_queries(counter):
+            yield from content
+        self.report(request, endpoint, counter)
+
+    def report(self, request, endpoint, counter):
+        logger.info(
+            '%s %s %s: %d queries, %.2f ms',
+            endpoint, request.method, request.path,
+            counter.count, round(counter.duration * 1000, 2)
+        )
+        budget = self.budgets.get(endpoint)
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                '%s превысил бюджет запросов: %d > %d',
+                endpoint, counter.count, budget
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None or view_class.__name__ not in self.views:
+            return None
+        method = request.method.lower()
+        actions = getattr(view_func, 'actions', None) or {}
+        request.query_count_endpoint = (
+            f'{view_class.__name__}.{actions.get(method, method)}'
+        )
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Задает для запроса выбор базы чтения (см. ReplicaRouter).
+    После небезопасного запроса пользователь на REPLICA_PIN_SECONDS
+    закрепляется за основной базой, чтобы видеть свои изменения
+    """
+
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        check_shared_cache()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_routing.set(RequestRouting(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        if request.method not in SAFE_METHODS:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
@@ -0,0 +1,89 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import SimpleLazyObject, empty
+
+REPLICA = 'replica'
+PIN_KEY = 'replica_pin:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Кэши, не общие для процессов: отметка о закреплении за основной базой
+# в них не видна другим воркерам gunicorn
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+# Токены и сессии читаются с основной базы: сразу после входа
+# свежий токен может еще не дойти до реплики
+PRIMARY_MODELS = {'authtoken.token', 'sessions.session'}
+
+current_routing = ContextVar('replica_routing', default=None)
+
+
+def check_shared_cache():
+    """Реплике нужен общий кэш, иначе закрепление работает в одном процессе"""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in PROCESS_LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            f'С репликой {REPLICA} нужен общий для процессов кэш '
+            f'(CACHE_BACKEND и CACHE_LOCATION), а не {backend}'
+        )
+
+
+def pin_to_primary(user_id):
+    """Направляет чтения пользователя на основную базу после его записи"""
+    cache.set(PIN_KEY.format(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+class RequestRouting:
+    """Выбор базы для чтений в рамках одного HTTP-запроса"""
+
+    def __init__(self, request):
+        self.request = request
+        self.use_replica = None if request.method in SAFE_METHODS else False
+
+    def get_user(self):
+        """
+        Пользователь, если он уже определен. Ленивый объект сессионной
+        аутентификации не вычисляется, чтобы не делать запрос из роутера
+        """
+        user = self.request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject):
+            user = user._wrapped
+        return None if user is empty else user
+
+    def db_for_read(self):
+        if self.use_replica is None:
+            user = self.get_user()
+            if user is None:
+                return REPLICA
+            self.use_replica = not (
+                user.is_authenticated and cache.get(PIN_KEY.format(user.pk))
+            )
+        return REPLICA if self.use_replica else None
+
+
+class ReplicaRouter:
+    """
+    Чтения в безопасных HTTP-запросах уходят на реплику, все записи,
+    запросы вне HTTP (задачи, команды) и чтения пользователя, недавно
+    изменявшего данные, идут на основную базу
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is None or model._meta.label_lower in PRIMARY_MODELS:
+            return None
+        return routing.db_for_read()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
@@ -18,12 +18,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'django_filters',
     'djoser',
     'recipes.apps.RecipesConfig',
     'users.apps.UsersConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 CSRF_TRUSTED_ORIGINS = [
@@ -34,6 +36,8 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 MIDDLEWARE = [
+    'backend_foodgram.middleware.QueryCountMiddleware',
+    'backend_foodgram.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,6 +67,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend_foodgram.wsgi.application'
 
+# Асинхронные представления частых запросов (см. recipes/async_urls.py),
+# включаются при запуске под ASGI-сервером
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
 
 DATABASES = {
     'default': {
@@ -75,6 +83,32 @@ DATABASES = {
     }
 }
 
+# Реплика для чтения подключается, если задан REPLICA_DB_HOST.
+# Для локальной проверки можно указать тот же хост, что и в DB_HOST
+if os.getenv('REPLICA_DB_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('REPLICA_DB_HOST'),
+        'PORT': os.getenv('REPLICA_DB_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['backend_foodgram.routers.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = 10
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Время жизни токена с пользователем в кэше, секунд; 0 отключает кэш.
+# С locmem другие процессы узнают о выходе пользователя только по истечении
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 30))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -111,11 +145,59 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 CSV_FILES_DIR = BASE_DIR.parent / 'data'
 
+INGREDIENT_AUTOCOMPLETE_LIMIT = 50
+
+CATALOG_CACHE_MAX_AGE = 0
+
+# Страховочное время жизни кэша ответов рецептов для анонимов, секунд
+RECIPE_RESPONSE_CACHE_TTL = 600
+
+FEED_FANOUT_LIMIT = 10000
+
+FEED_BATCH_SIZE = 1000
+
+IMAGE_VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+IMAGE_VARIANT_QUALITY = 80
+
+# Размеры производных изображений: (ширина, высота, обрезать по размеру)
+RECIPE_IMAGE_SIZES = {
+    'card': (600, 400, True),
+    'detail': (1200, 1200, False),
+}
+
+AVATAR_IMAGE_SIZES = {
+    'thumb': (96, 96, True),
+}
+
+# Ключ перемешивания id в коротких ссылках: нечетное, не кратное 31 число.
+# После смены ключа выданные ссылки перестанут открываться
+SHORT_LINK_KEY = int(os.getenv('SHORT_LINK_KEY', 1580030173))
+
+SHORT_LINK_HOST = os.getenv('SHORT_LINK_HOST', 'foodgram-yp.zapto.org')
+
+SHORT_LINK_LEGACY_CACHE_SIZE = 4096
+
+SHORT_LINK_MAX_AGE = 60 * 60 * 24
+
+JOB_WORKER_THREADS = int(os.getenv('JOB_WORKER_THREADS', 2))
+
+JOB_POLL_INTERVAL = 1
+
+JOB_MAX_ATTEMPTS = 5
+
+# Задержка перед повтором: JOB_RETRY_BACKOFF * 2^(попытка - 1) секунд
+JOB_RETRY_BACKOFF = 10
+
+JOB_RETRY_MAX_DELAY = 3600
+
+JOB_TIMEOUT = 600
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -137,6 +219,40 @@ DJOSER = {
     },
 }
 
+QUERY_COUNT_ENABLED = os.getenv('QUERY_COUNT_ENABLED', 'False') == 'True'
+
+QUERY_COUNT_HEADERS = os.getenv('QUERY_COUNT_HEADERS', 'False') == 'True'
+
+QUERY_COUNT_VIEWS = (
+    'RecipeViewSet',
+    'UserViewSet',
+    'SubscribeViewSet',
+    'FavoriteViewSet',
+    'ShoppingCartViewSet',
+    'FavoriteBulkView',
+    'ShoppingCartBulkView',
+)
+
+QUERY_BUDGETS = {
+    'RecipeViewSet.list': 5,
+    'RecipeViewSet.retrieve': 4,
+    'UserViewSet.retrieve': 3,
+    'UserViewSet.get_me': 2,
+    'SubscribeViewSet.list': 4,
+    'RecipeViewSet.feed': 6,
+    'RecipeViewSet.create': 12,
+    'RecipeViewSet.partial_update': 15,
+    'FavoriteViewSet.post': 4,
+    'FavoriteViewSet.delete': 5,
+    'ShoppingCartViewSet.post': 4,
+    'ShoppingCartViewSet.delete': 5,
+    'ShoppingCartViewSet.download_shopping_cart': 2,
+    'FavoriteBulkView.post': 5,
+    'FavoriteBulkView.delete': 4,
+    'ShoppingCartBulkView.post': 5,
+    'ShoppingCartBulkView.delete': 4,
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -152,5 +268,10 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'backend_foodgram.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
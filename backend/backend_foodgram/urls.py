@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from recipes.views import DecodeView
@@ -12,3 +13,7 @@ urlpatterns = [
         DecodeView.as_view(), name='short_link_decode'
     ),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Асинхронные версии частых запросов для запуска под uvicorn
+    urlpatterns.insert(0, path('', include('recipes.async_urls')))
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from jobs.models import Job
+
+
+@admin.action(description='Перезапустить')
+def retry_jobs(modeladmin, request, queryset):
+    queryset.exclude(status=Job.RUNNING).update(
+        status=Job.QUEUED, attempts=0, run_at=timezone.now()
+    )
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'run_at', 'locked_by')
+    list_filter = ('status',)
+    search_fields = ('task',)
+    actions = (retry_jobs,)
+
+
+admin.site.register(Job, JobAdmin)
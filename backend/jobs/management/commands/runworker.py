@@ -0,0 +1,104 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from jobs.queue import claim, release_stale, run
+
+
+class Command(BaseCommand):
+    help = 'Обработка фоновых задач из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOB_WORKER_THREADS,
+            help='Число потоков, одновременно выполняющих задачи'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, в секундах'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда готовых задач не останется'
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.poll_interval = options['poll_interval']
+        self.burst = options['burst']
+        signal.signal(signal.SIGTERM, self.shutdown)
+        signal.signal(signal.SIGINT, self.shutdown)
+
+        self.release_stale()
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(
+                target=self.work, args=(f'{prefix}:{number}',),
+                name=f'runworker-{number}'
+            )
+            for number in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f'Обработчик запущен, потоков: {len(threads)}')
+        # Зависшие задачи возвращает только главный поток,
+        # раз в JOB_TIMEOUT / 2, а не каждый опрос пустой очереди
+        released_at = time.monotonic()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+                if time.monotonic() - released_at >= settings.JOB_TIMEOUT / 2:
+                    self.release_stale()
+                    released_at = time.monotonic()
+        self.stdout.write('Обработчик остановлен')
+
+    def shutdown(self, signum, frame):
+        """Текущие задачи дорабатывают, новые не берутся"""
+        self.stop.set()
+
+    def release_stale(self):
+        """Ошибка базы не останавливает обработчик: повтор по таймеру"""
+        try:
+            release_stale()
+        except Exception as error:
+            self.stderr.write(f'release_stale: {error}')
+        finally:
+            connections.close_all()
+
+    def work(self, worker):
+        """
+        Ошибка базы не завершает поток: соединение закрывается,
+        и после паузы опрос очереди повторяется
+        """
+        try:
+            while not self.stop.is_set():
+                try:
+                    if not self.step(worker):
+                        return
+                except Exception as error:
+                    self.stderr.write(f'{worker}: {error}')
+                    connections.close_all()
+                    self.stop.wait(self.poll_interval)
+        finally:
+            connections.close_all()
+
+    def step(self, worker):
+        """Выполняет одну задачу; False, если в режиме --burst их нет"""
+        close_old_connections()
+        job = claim(worker)
+        if job is not None:
+            try:
+                run(job)
+            except Exception as error:
+                self.stderr.write(f'{worker}: {error}')
+            return True
+        if self.burst:
+            return False
+        self.stop.wait(self.poll_interval)
+        return True
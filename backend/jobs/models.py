@@ -0,0 +1,63 @@
+from django.db import models
+from django.utils import timezone
+
+LENG_TASK = 255
+LENG_WORKER = 100
+
+
+class Job(models.Model):
+    """Фоновая задача: вызов функции по ее пути с JSON-аргументами"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(verbose_name='Задача', max_length=LENG_TASK)
+    args = models.JSONField(
+        verbose_name='Аргументы', default=list, blank=True
+    )
+    kwargs = models.JSONField(
+        verbose_name='Именованные аргументы', default=dict, blank=True
+    )
+    status = models.CharField(
+        verbose_name='Статус', max_length=16,
+        choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток', default=0
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток', default=5
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запуск не раньше', default=timezone.now
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Взята в работу', null=True, blank=True
+    )
+    locked_by = models.CharField(
+        verbose_name='Обработчик', max_length=LENG_WORKER, blank=True
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    created_at = models.DateTimeField(
+        verbose_name='Создана', auto_now_add=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['run_at', 'id'],
+                condition=models.Q(status='queued'),
+                name='job_queued_idx'
+            ),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('run_at', 'id')
+
+    def __str__(self):
+        return f'{self.task} ({self.get_status_display()})'
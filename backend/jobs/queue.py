@@ -0,0 +1,105 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_name(func):
+    if '.' in func.__qualname__ or '<' in func.__qualname__:
+        raise ValueError(
+            'В очередь можно ставить только функции уровня модуля'
+        )
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, delay=0, max_attempts=None, **kwargs):
+    """
+    Ставит вызов func(*args, **kwargs) в очередь. Аргументы должны
+    сериализоваться в JSON. Запись создается в текущей транзакции,
+    поэтому обработчик увидит задачу только после ее коммита
+    """
+    return Job.objects.create(
+        task=task_name(func),
+        args=list(args),
+        kwargs=kwargs,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim(worker):
+    """
+    Берет в работу первую готовую задачу. Строки, заблокированные
+    другими обработчиками, пропускаются (FOR UPDATE SKIP LOCKED)
+    """
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED, run_at__lte=timezone.now()
+        ).order_by('run_at', 'id').first()
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.locked_at = timezone.now()
+        job.locked_by = worker
+        job.save(update_fields=(
+            'status', 'attempts', 'locked_at', 'locked_by'
+        ))
+    return job
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой, в секундах"""
+    return min(
+        settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_DELAY
+    )
+
+
+def run(job):
+    """
+    Выполняет задачу. Успешная задача удаляется из очереди,
+    упавшая возвращается в очередь с задержкой или помечается ошибкой
+    """
+    try:
+        import_string(job.task)(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Задача %s #%d завершилась ошибкой', job.task, job.pk)
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts)
+            )
+        else:
+            job.status = Job.FAILED
+        job.save(update_fields=(
+            'status', 'run_at', 'locked_at', 'last_error'
+        ))
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def release_stale():
+    """
+    Возвращает в очередь задачи, обработчик которых не отчитался
+    за JOB_TIMEOUT секунд (например, был остановлен посреди работы)
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None
+    )
+    return stale.update(status=Job.QUEUED, locked_at=None)
@@ -24,7 +24,7 @@ class RecipeAdmin(admin.ModelAdmin):
     @admin.display(description='Добавлен в избранное (раз)')
     def favorited_count(self, obj):
         """Показывает сколько раз рецепт был добавлен в избранное."""
-        return obj.favorited_by.count()
+        return obj.favorites_count
 
 
 class IngredientAdmin(admin.ModelAdmin):
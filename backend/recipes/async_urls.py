@@ -0,0 +1,11 @@
+from django.urls import path
+from recipes import async_views
+
+urlpatterns = [
+    path('api/recipes/', async_views.recipe_list),
+    path('api/recipes/<int:pk>/', async_views.recipe_detail),
+    path('api/recipes/<int:id>/favorite/', async_views.favorite),
+    path('api/recipes/<int:id>/shopping_cart/', async_views.shopping_cart),
+    path('api/ingredients/', async_views.ingredient_list),
+    path('s/<str:short_link>/', async_views.decode_short_link),
+]
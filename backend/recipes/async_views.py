@@ -0,0 +1,273 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+from django.utils.translation import gettext as _
+from recipes.catalogs import (aget_catalog_version,
+                              catalog_conditional_response,
+                              patch_catalog_headers)
+from recipes.filters import RecipeFilter, RecipeFilterBackend
+from recipes.ingredient_index import ingredient_index
+from recipes.links import add_link, remove_link
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.pagination import RecipePagination
+from recipes.response_cache import GLOBAL, LIST, aresponse_key
+from recipes.serializers import IngredientSerializer, RecipeReadSerializer
+from recipes.short_links import decode, resolve_legacy
+from recipes.views import (FavoriteViewSet, IngredientViewSet, RecipeViewSet,
+                           ShoppingCartViewSet)
+from rest_framework import exceptions, status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from users.authentication import aget_token, check_token
+
+recipe_list_view = RecipeViewSet.as_view(
+    {'get': 'list', 'post': 'create'}, basename='recipes', detail=False
+)
+recipe_detail_view = RecipeViewSet.as_view(
+    {
+        'get': 'retrieve', 'put': 'update',
+        'patch': 'partial_update', 'delete': 'destroy'
+    },
+    basename='recipes', detail=True
+)
+ingredient_list_view = IngredientViewSet.as_view(
+    {'get': 'list'}, basename='ingredients', detail=False
+)
+favorite_view = FavoriteViewSet.as_view()
+shopping_cart_view = ShoppingCartViewSet.as_view(
+    {'post': 'post', 'delete': 'delete'}
+)
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status_code,
+        content_type='application/json'
+    )
+
+
+def error(exception):
+    return render({'detail': exception.detail}, exception.status_code)
+
+
+def not_found(model):
+    """Ошибка 404 с тем же текстом, что у get_object_or_404 в DRF"""
+    return exceptions.NotFound(
+        f'No {model._meta.object_name} matches the given query.'
+    )
+
+
+async def delegate(view, request, *args, **kwargs):
+    """Передает запрос синхронному DRF-представлению"""
+    return await sync_to_async(view)(request, *args, **kwargs)
+
+
+def async_endpoint(view):
+    """
+    Как и DRF, представления не проверяют CSRF: клиенты
+    аутентифицируются токеном, а не сессией
+    """
+    view.csrf_exempt = True
+    return view
+
+
+async def aauthenticate(request):
+    """
+    Асинхронный аналог CachedTokenAuthentication с тем же кэшем
+    и тем же правилом для изменяющих запросов.
+    Недействительный токен дает ошибку 401, как и в DRF
+    """
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != 'token':
+        return AnonymousUser()
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. No credentials provided.')
+        )
+    user, _token = check_token(await aget_token(
+        auth[1], cached=request.method in SAFE_METHODS
+    ))
+    # Как и DRF, передаем пользователя в HttpRequest: по нему
+    # ReplicaRoutingMiddleware закрепляет автора изменений за основной базой
+    request.user = user
+    return user
+
+
+def recipe_queryset(user):
+    """Тот же набор, что у RecipeViewSet.get_queryset для чтения"""
+    return Recipe.objects.with_user_flags(user).with_related().order_by(
+        'name', 'id'
+    )
+
+
+async def cached_data(request, user, scopes, build):
+    """Кэш ответов для анонимов, общий с RecipeResponseCacheMixin"""
+    if user.is_authenticated:
+        return await build()
+    key = await aresponse_key(request, *scopes)
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data, settings.RECIPE_RESPONSE_CACHE_TTL)
+    return data
+
+
+@async_endpoint
+async def recipe_list(request):
+    """Список рецептов с фильтрами и пагинацией limit/offset"""
+    if request.method != 'GET':
+        return await delegate(recipe_list_view, request)
+    paginator = RecipePagination()
+    api_request = Request(request)
+    if paginator.use_cursor(api_request):
+        return await delegate(recipe_list_view, request)
+    try:
+        user = await aauthenticate(request)
+    except exceptions.APIException as exception:
+        return error(exception)
+    api_request.user = user
+
+    queryset = RecipeFilterBackend().filter_queryset(
+        api_request, recipe_queryset(user), None
+    )
+    filterset = RecipeFilter(
+        api_request.query_params, queryset, request=api_request
+    )
+    if not filterset.is_valid():
+        return render(filterset.errors, status.HTTP_400_BAD_REQUEST)
+    queryset = filterset.qs
+
+    async def build():
+        recipes = await sync_to_async(paginator.paginate_queryset)(
+            queryset, api_request
+        )
+        serializer = RecipeReadSerializer(
+            recipes, many=True, context={'request': api_request}
+        )
+        return paginator.get_paginated_response(serializer.data).data
+
+    return render(await cached_data(request, user, (GLOBAL, LIST), build))
+
+
+@async_endpoint
+async def recipe_detail(request, pk):
+    """Карточка рецепта"""
+    if request.method != 'GET':
+        return await delegate(recipe_detail_view, request, pk=pk)
+    try:
+        user = await aauthenticate(request)
+    except exceptions.APIException as exception:
+        return error(exception)
+    api_request = Request(request)
+    api_request.user = user
+
+    async def build():
+        recipe = await recipe_queryset(user).filter(pk=pk).afirst()
+        if recipe is None:
+            raise not_found(Recipe)
+        return RecipeReadSerializer(
+            recipe, context={'request': api_request}
+        ).data
+
+    try:
+        data = await cached_data(request, user, (GLOBAL, pk), build)
+    except exceptions.APIException as exception:
+        return error(exception)
+    return render(data)
+
+
+@async_endpoint
+async def ingredient_list(request):
+    """Автодополнение ингредиентов по префиксу из индекса в памяти"""
+    prefix = (
+        request.GET.get('name') or request.GET.get('search', '')
+    ).strip()
+    if request.method != 'GET' or not prefix:
+        return await delegate(ingredient_list_view, request)
+    try:
+        await aauthenticate(request)
+    except exceptions.APIException as exception:
+        return error(exception)
+    etag, last_modified, response = catalog_conditional_response(
+        request, 'ingredients', await aget_catalog_version('ingredients')
+    )
+    if response is None:
+        ingredients = await ingredient_index.asearch(
+            prefix, settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+        )
+        response = render(IngredientSerializer(ingredients, many=True).data)
+    return patch_catalog_headers(response, etag, last_modified)
+
+
+@async_endpoint
+async def decode_short_link(request, short_link):
+    """Асинхронный вариант DecodeView"""
+    recipe_id = decode(short_link)
+    if recipe_id is None:
+        recipe_id = await sync_to_async(resolve_legacy)(short_link)
+    if recipe_id is None:
+        return error(exceptions.NotFound('Рецепт не найден'))
+    response = HttpResponseRedirect(f'/recipes/{recipe_id}')
+    patch_cache_control(
+        response, public=True, max_age=settings.SHORT_LINK_MAX_AGE
+    )
+    return response
+
+
+def recipe_toggle(model, view_class, sync_view):
+    """
+    Добавление рецепта в избранное или список покупок (POST)
+    и удаление из него (DELETE) с теми же ответами, что у DRF-версии:
+    сериализатор и сообщения берутся из view_class
+    """
+    @async_endpoint
+    async def view(request, id):
+        if request.method not in ('POST', 'DELETE'):
+            return await delegate(sync_view, request, id=id)
+        try:
+            user = await aauthenticate(request)
+            if not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exception:
+            return error(exception)
+
+        if request.method == 'POST':
+            recipe = await Recipe.objects.filter(pk=id).only(
+                'id', 'name', 'image', 'cooking_time'
+            ).afirst()
+            if recipe is None:
+                return error(not_found(Recipe))
+            link = await sync_to_async(add_link)(
+                model, user=user, recipe=recipe
+            )
+            if link is None:
+                return render(
+                    {'detail': view_class.added_message},
+                    status.HTTP_400_BAD_REQUEST
+                )
+            serializer = view_class.serializer_class(
+                link, context={'request': Request(request)}
+            )
+            return render(serializer.data, status.HTTP_201_CREATED)
+        if not await sync_to_async(remove_link)(
+            model, user=user, recipe_id=id
+        ):
+            if not await Recipe.objects.filter(pk=id).aexists():
+                return error(not_found(Recipe))
+            return render(
+                {'detail': view_class.missing_message},
+                status.HTTP_400_BAD_REQUEST
+            )
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    return view
+
+
+favorite = recipe_toggle(Favorite, FavoriteViewSet, favorite_view)
+shopping_cart = recipe_toggle(
+    ShoppingCart, ShoppingCartViewSet, shopping_cart_view
+)
@@ -0,0 +1,74 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+CATALOG_VERSION_KEY = 'catalog_version:{}'
+
+
+def bump_catalog_version(catalog):
+    """
+    Помечает каталог измененным: новая версия и время изменения.
+    Версия меняется после коммита транзакции, как в bump_versions
+    """
+    transaction.on_commit(lambda: cache.set(
+        CATALOG_VERSION_KEY.format(catalog),
+        (uuid.uuid4().hex, int(time.time())),
+        timeout=None
+    ))
+
+
+def get_catalog_version(catalog):
+    """
+    Возвращает пару (версия, время изменения) каталога.
+    Если в кэше версии нет, создается новая
+    """
+    key = CATALOG_VERSION_KEY.format(catalog)
+    version = cache.get(key)
+    if version is None:
+        cache.add(
+            key, (uuid.uuid4().hex, int(time.time())),
+            timeout=None
+        )
+        version = cache.get(key)
+    return version
+
+
+async def aget_catalog_version(catalog):
+    key = CATALOG_VERSION_KEY.format(catalog)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(
+            key, (uuid.uuid4().hex, int(time.time())),
+            timeout=None
+        )
+        version = await cache.aget(key)
+    return version
+
+
+def catalog_conditional_response(request, catalog, version):
+    """
+    Возвращает ETag, время изменения и ответ 304,
+    если у клиента уже есть текущая версия каталога
+    """
+    version, last_modified = version
+    etag = quote_etag(f'{catalog}-{version}')
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    return etag, last_modified, response
+
+
+def patch_catalog_headers(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(
+            response, public=True, must_revalidate=True,
+            max_age=settings.CATALOG_CACHE_MAX_AGE
+        )
+    return response
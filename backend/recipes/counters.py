@@ -0,0 +1,108 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно изменяет счетчик одной строки без чтения ее в память"""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def count_subquery(model, field):
+    """Коррелированный подзапрос COUNT(*) по внешнему ключу field"""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), Value(0))
+
+
+class CounterFieldsMixin:
+    """
+    Обычное сохранение существующей строки не пишет counter_fields:
+    иначе save() с прочитанными ранее значениями затрет приращения,
+    сделанные параллельно через F()
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding and not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            skipped = {*self.counter_fields, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+                and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+# Счетчики, подключенные через track_counter: model -> [(field, ...)]
+tracked_counters = defaultdict(list)
+
+
+def origin_model(origin):
+    """Модель объекта или QuerySet, с удаления которого началось каскадное"""
+    return getattr(origin, 'model', type(origin))
+
+
+def track_counter(model, field, target_model, target_field,
+                  released_by=()):
+    """
+    Подключает обработчики, которые увеличивают счетчик target_field
+    при создании строки model и уменьшают его при удалении.
+    Каскад от удаления target_model не трогает счетчик: удаляется
+    сама строка со счетчиком. Каскад от моделей из released_by
+    пропускается, их обработчик pre_delete уменьшает счетчики
+    пачкой через change_counters
+    """
+    tracked_counters[model].append((field, target_model, target_field))
+    skipped_origins = (target_model, *released_by)
+
+    @receiver(post_save, sender=model, weak=False)
+    def increment(sender, instance, created, **kwargs):
+        if created:
+            change_counter(
+                target_model, getattr(instance, f'{field}_id'),
+                target_field, 1
+            )
+
+    @receiver(post_delete, sender=model, weak=False)
+    def decrement(sender, instance, origin=None, **kwargs):
+        if origin is not None and issubclass(
+            origin_model(origin), skipped_origins
+        ):
+            return
+        change_counter(
+            target_model, getattr(instance, f'{field}_id'), target_field, -1
+        )
+
+
+def change_counters(model, instances, delta):
+    """
+    Обновляет счетчики для строк model, созданных или удаленных
+    без сигналов (bulk_create, удаление одним DELETE): по одному
+    UPDATE на каждое встретившееся число строк у одного объекта
+    """
+    for field, target_model, target_field in tracked_counters[model]:
+        counts = Counter(
+            getattr(instance, f'{field}_id') for instance in instances
+        )
+        pks_by_count = defaultdict(list)
+        for pk, count in counts.items():
+            pks_by_count[count].append(pk)
+        for count, pks in pks_by_count.items():
+            target_model.objects.filter(pk__in=pks).update(**{
+                target_field: Greatest(
+                    F(target_field) + delta * count, Value(0)
+                )
+            })
@@ -0,0 +1,120 @@
+from heapq import merge
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Subquery
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe, User
+
+
+def is_fanout_author(author_id):
+    """
+    Рецепты автора раскладываются по лентам подписчиков при записи,
+    если подписчиков не больше FEED_FANOUT_LIMIT
+    """
+    return User.objects.filter(
+        pk=author_id, followers_count__lte=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out_recipe(recipe_id, author_id):
+    """Добавляет новый рецепт в ленты подписчиков автора"""
+    if not is_fanout_author(author_id):
+        return
+    if not Recipe.objects.filter(pk=recipe_id).exists():
+        return
+    follower_ids = Subscribe.objects.filter(
+        following_id=author_id
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id, author_id=author_id
+            )
+            for user_id in follower_ids.iterator()
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill_subscription(user_id, following_id):
+    """Добавляет в ленту подписчика уже опубликованные рецепты автора"""
+    if not is_fanout_author(following_id):
+        return
+    if not Subscribe.objects.filter(
+        user_id=user_id, following_id=following_id
+    ).exists():
+        return
+    recipe_ids = Recipe.objects.filter(
+        author_id=following_id
+    ).values_list('id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id,
+                author_id=following_id
+            )
+            for recipe_id in recipe_ids.iterator()
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def prune_subscription(subscribe):
+    """Убирает из ленты рецепты автора, от которого пользователь отписался"""
+    FeedEntry.objects.filter(
+        user_id=subscribe.user_id, author_id=subscribe.following_id
+    ).delete()
+
+
+def rebuild_feed():
+    """
+    Заполняет ленты по всем подпискам, например после bulk_create,
+    одним INSERT ... SELECT; возвращает число добавленных записей
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FeedEntry._meta.db_table} '
+            f'(user_id, recipe_id, author_id) '
+            f'SELECT subscribe.user_id, recipe.id, recipe.author_id '
+            f'FROM {Subscribe._meta.db_table} AS subscribe '
+            f'JOIN {User._meta.db_table} AS author '
+            f'ON author.id = subscribe.following_id '
+            f'JOIN {Recipe._meta.db_table} AS recipe '
+            f'ON recipe.author_id = subscribe.following_id '
+            f'WHERE author.followers_count <= %s '
+            f'ON CONFLICT DO NOTHING',
+            [settings.FEED_FANOUT_LIMIT]
+        )
+        return cursor.rowcount
+
+
+def get_feed_recipe_ids(user, before, limit):
+    """
+    Возвращает до limit id рецептов ленты по убыванию, меньших before.
+    Записи ленты читаются одним диапазоном по индексу (user, recipe),
+    рецепты авторов с большим числом подписчиков подмешиваются при чтении
+    """
+    timeline = FeedEntry.objects.filter(user=user)
+    popular = Recipe.objects.filter(author_id__in=Subquery(
+        Subscribe.objects.filter(
+            user=user,
+            following__followers_count__gt=settings.FEED_FANOUT_LIMIT
+        ).values('following_id')
+    ))
+    if before is not None:
+        timeline = timeline.filter(recipe_id__lt=before)
+        popular = popular.filter(id__lt=before)
+    timeline_ids = timeline.order_by('-recipe_id').values_list(
+        'recipe_id', flat=True
+    )[:limit]
+    popular_ids = popular.order_by('-id').values_list('id', flat=True)[:limit]
+
+    recipe_ids = []
+    for recipe_id in merge(timeline_ids, popular_ids, reverse=True):
+        if not recipe_ids or recipe_ids[-1] != recipe_id:
+            recipe_ids.append(recipe_id)
+    return list(islice(recipe_ids, limit))
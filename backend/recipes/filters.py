@@ -1,27 +1,39 @@
 import django_filters
-from recipes.models import Ingredient, Recipe
+from django.db.models import Exists, OuterRef
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            TagRecipe)
 from rest_framework import filters
 
 
 class RecipeFilterBackend(filters.BaseFilterBackend):
-    """Фильтрация по избранному и корзине"""
+    """
+    Фильтрация по избранному и корзине.
+    Условия строятся через EXISTS, поэтому дубликатов строк нет
+    и DISTINCT не нужен
+    """
     def filter_queryset(self, request, queryset, view):
         user = request.user
         is_favorited = request.query_params.get('is_favorited')
         is_in_shopping_cart = request.query_params.get('is_in_shopping_cart')
 
         if user.is_authenticated:
+            favorited = Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+            in_shopping_cart = Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
             if is_favorited is not None:
                 if is_favorited.lower() in ['true', '1']:
-                    queryset = queryset.filter(favorited_by__user=user)
+                    queryset = queryset.filter(favorited)
                 elif is_favorited.lower() in ['false', '0']:
-                    queryset = queryset.exclude(favorited_by__user=user)
+                    queryset = queryset.filter(~favorited)
 
             if is_in_shopping_cart is not None:
                 if is_in_shopping_cart.lower() in ['true', '1']:
-                    queryset = queryset.filter(in_shopping_cart__user=user)
+                    queryset = queryset.filter(in_shopping_cart)
                 elif is_in_shopping_cart.lower() in ['false', '0']:
-                    queryset = queryset.exclude(in_shopping_cart__user=user)
+                    queryset = queryset.filter(~in_shopping_cart)
         return queryset
 
 
@@ -38,14 +50,21 @@ class IngredientFilter(django_filters.FilterSet):
 
 
 class RecipeFilter(django_filters.FilterSet):
-    """Фильтрация по нескольким тегам"""
+    """Фильтрация по нескольким тегам, автору и поиск по тексту"""
     author = django_filters.NumberFilter(field_name='author__id')
     tags = django_filters.CharFilter(method='filter_to_tag')
+    search = django_filters.CharFilter(method='filter_search')
 
     def filter_to_tag(self, queryset, name, value):
         tags = self.request.query_params.getlist('tags')
-        return queryset.filter(tags__slug__in=tags)
+        return queryset.filter(Exists(TagRecipe.objects.filter(
+            recipe=OuterRef('pk'), tag__slug__in=tags
+        )))
+
+    def filter_search(self, queryset, name, value):
+        """Поиск по названию и описанию рецепта"""
+        return queryset.search(value)
 
     class Meta:
         model = Recipe
-        fields = ['tags', 'author']
+        fields = ['tags', 'author', 'search']
@@ -0,0 +1,91 @@
+import io
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from jobs.queue import enqueue
+from PIL import Image, ImageOps
+
+
+def variant_name(source, size, image_format):
+    """Путь производного изображения рядом с оригиналом"""
+    path = PurePosixPath(source)
+    return str(
+        path.parent / 'variants' / f'{path.stem}_{size}.{image_format}'
+    )
+
+
+def render_variant(image, width, height, crop, image_format):
+    if crop:
+        variant = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    else:
+        variant = image.copy()
+        variant.thumbnail((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(
+        buffer, format=settings.IMAGE_VARIANT_FORMATS[image_format],
+        quality=settings.IMAGE_VARIANT_QUALITY
+    )
+    return ContentFile(buffer.getvalue())
+
+
+def delete_variants(variants):
+    for size, formats in variants.items():
+        if size == 'source':
+            continue
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def generate_variants(model_label, pk, image_field, variants_field, sizes):
+    """
+    Создает уменьшенные копии изображения во всех размерах и форматах
+    и сохраняет их пути, обновляя только поле variants_field
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only(
+        image_field, variants_field
+    ).first()
+    if instance is None:
+        return
+    image_file = getattr(instance, image_field)
+    old_variants = getattr(instance, variants_field) or {}
+    if old_variants.get('source') == (image_file.name or None):
+        return
+
+    variants = {}
+    if image_file:
+        with image_file.open('rb') as source:
+            image = ImageOps.exif_transpose(Image.open(source))
+            image = image.convert('RGB')
+        variants['source'] = image_file.name
+        for size, (width, height, crop) in sizes.items():
+            variants[size] = {}
+            for image_format in settings.IMAGE_VARIANT_FORMATS:
+                name = variant_name(image_file.name, size, image_format)
+                default_storage.delete(name)
+                variants[size][image_format] = default_storage.save(
+                    name,
+                    render_variant(image, width, height, crop, image_format)
+                )
+    setattr(instance, variants_field, variants)
+    instance.save(update_fields=(variants_field,))
+    if old_variants.get('source') != variants.get('source'):
+        delete_variants(old_variants)
+
+
+def schedule_variants(instance, image_field, variants_field, sizes):
+    """
+    Ставит генерацию производных изображений в очередь задач,
+    если изображение изменилось с прошлой генерации
+    """
+    image_file = getattr(instance, image_field)
+    variants = getattr(instance, variants_field) or {}
+    if variants.get('source') == (image_file.name or None):
+        return
+    enqueue(
+        generate_variants, instance._meta.label, instance.pk,
+        image_field, variants_field, sizes
+    )
@@ -0,0 +1,90 @@
+from bisect import bisect_left
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+from recipes.catalogs import (aget_catalog_version, bump_catalog_version,
+                              get_catalog_version)
+from recipes.models import Ingredient
+
+CATALOG = 'ingredients'
+PREFIX_END = chr(0x10FFFF)
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения по префиксу.
+    Хранит отсортированный массив названий и ищет диапазон бинарным
+    поиском. Индекс перестраивается, если изменилась версия каталога
+    ингредиентов
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.keys = []
+        self.entries = []
+        self.version = None
+
+    def invalidate(self):
+        """Сбрасывает индекс во всех процессах, использующих общий кэш"""
+        bump_catalog_version(CATALOG)
+        self.version = None
+
+    def is_stale(self, version):
+        return self.version != version
+
+    def build(self, version):
+        rows = sorted(
+            (name.casefold(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        self.keys = [row[0] for row in rows]
+        self.entries = [row[1:] for row in rows]
+        self.version = version
+
+    def ensure_fresh(self):
+        version = get_catalog_version(CATALOG)
+        if self.is_stale(version):
+            with self.lock:
+                if self.is_stale(version):
+                    self.build(version)
+
+    def search(self, prefix, limit):
+        """
+        Возвращает не более limit ингредиентов, название которых
+        начинается с prefix: сначала точное совпадение, затем более
+        короткие названия
+        """
+        self.ensure_fresh()
+        return self.lookup(prefix, limit)
+
+    async def asearch(self, prefix, limit):
+        """
+        Асинхронный поиск: база данных нужна только для перестроения
+        устаревшего индекса, которое выполняется в отдельном потоке
+        """
+        if self.is_stale(await aget_catalog_version(CATALOG)):
+            await sync_to_async(self.ensure_fresh)()
+        return self.lookup(prefix, limit)
+
+    def lookup(self, prefix, limit):
+        prefix = prefix.casefold()
+        keys, entries = self.keys, self.entries
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + PREFIX_END, lo=start)
+        matches = sorted(
+            range(start, end),
+            key=lambda position: (
+                keys[position] != prefix, len(keys[position]), position
+            )
+        )[:limit]
+        return [
+            Ingredient(id=pk, name=name, measurement_unit=measurement_unit)
+            for pk, name, measurement_unit in (
+                entries[position] for position in matches
+            )
+        ]
+
+
+ingredient_index = IngredientIndex()
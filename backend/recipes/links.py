@@ -0,0 +1,146 @@
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models.signals import post_delete
+from recipes.counters import change_counters
+from recipes.models import Recipe
+
+CREATED = 'created'
+DELETED = 'deleted'
+EXISTS = 'exists'
+MISSING = 'missing'
+NOT_FOUND = 'not_found'
+
+
+def add_link(model, **fields):
+    """
+    Вставляет связь без предварительной проверки exists().
+    Если такая связь уже есть (в том числе при одновременных
+    запросах), возвращает None вместо ошибки IntegrityError
+    """
+    try:
+        with transaction.atomic():
+            return model.objects.create(**fields)
+    except IntegrityError:
+        return None
+
+
+def remove_link(model, **fields):
+    """
+    Удаляет связь одним DELETE ... RETURNING и возвращает True,
+    если строка была. Удаление идет мимо Collector, поэтому post_delete
+    (счетчики, лента подписок) отправляется вручную с id удаленной строки
+    """
+    instance = model(**fields)
+    db = router.db_for_write(model)
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    # get_field находит поле и по имени, и по attname (recipe_id)
+    lookups = [model._meta.get_field(name) for name in fields]
+    where = ' AND '.join(f'{quote(field.column)} = %s' for field in lookups)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {where} '
+            f'RETURNING {quote(model._meta.pk.column)}',
+            [getattr(instance, field.attname) for field in lookups]
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return False
+    instance.pk = row[0]
+    post_delete.send(
+        sender=model, instance=instance, using=db, origin=instance
+    )
+    return True
+
+
+def insert_links(model, user, recipe_ids):
+    """
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING: возвращает
+    id рецептов, для которых связь действительно создана этим запросом.
+    Рецепты, удаленные к моменту вставки, пропускаются
+    """
+    db = router.db_for_write(model)
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    user_column = quote(model._meta.get_field('user').column)
+    recipe_column = quote(model._meta.get_field('recipe').column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({user_column}, {recipe_column}) '
+            f'SELECT %s, id FROM {quote(Recipe._meta.db_table)} '
+            f'WHERE id = ANY(%s) '
+            f'ON CONFLICT DO NOTHING RETURNING {recipe_column}',
+            [user.id, list(recipe_ids)]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def bulk_add_links(model, user, recipe_ids):
+    """
+    Добавляет рецепты в избранное или список покупок пользователя.
+    Рецепты проверяются одним запросом in_bulk, связи вставляются
+    одним INSERT; статусы и счетчики считаются по строкам, которые
+    вернула вставка, а не по чтению до нее
+    """
+    with transaction.atomic():
+        recipes = Recipe.objects.only('id').in_bulk(recipe_ids)
+        created = insert_links(model, user, recipes) if recipes else set()
+        change_counters(model, [
+            model(user=user, recipe_id=recipe_id) for recipe_id in created
+        ], 1)
+    return [
+        {
+            'id': recipe_id,
+            'status': (
+                NOT_FOUND if recipe_id not in recipes
+                else CREATED if recipe_id in created
+                else EXISTS
+            )
+        }
+        for recipe_id in recipe_ids
+    ]
+
+
+def delete_links(model, user, recipe_ids):
+    """
+    DELETE ... RETURNING: возвращает id рецептов, связи с которыми
+    удалил именно этот запрос, включая вставленные параллельно
+    """
+    db = router.db_for_write(model)
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    user_column = quote(model._meta.get_field('user').column)
+    recipe_column = quote(model._meta.get_field('recipe').column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {user_column} = %s AND {recipe_column} = ANY(%s) '
+            f'RETURNING {recipe_column}',
+            [user.id, list(recipe_ids)]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def bulk_remove_links(model, user, recipe_ids):
+    """
+    Удаляет рецепты из избранного или списка покупок пользователя
+    одним DELETE ... RETURNING; счетчики уменьшаются ровно
+    для удаленных строк
+    """
+    with transaction.atomic():
+        recipes = Recipe.objects.only('id').in_bulk(recipe_ids)
+        deleted = delete_links(model, user, recipes) if recipes else set()
+        change_counters(model, [
+            model(user=user, recipe_id=recipe_id) for recipe_id in deleted
+        ], -1)
+    return [
+        {
+            'id': recipe_id,
+            'status': (
+                NOT_FOUND if recipe_id not in recipes
+                else DELETED if recipe_id in deleted
+                else MISSING
+            )
+        }
+        for recipe_id in recipe_ids
+    ]
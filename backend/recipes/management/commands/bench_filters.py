@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag, TagRecipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение планов и времени запроса списка рецептов '
+        'с фильтрами через JOIN + DISTINCT и через EXISTS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int,
+            help='id пользователя для фильтров избранного и корзины'
+        )
+        parser.add_argument('--tags', nargs='*', help='Слаги тегов')
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--offset', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='EXPLAIN ANALYZE вместо EXPLAIN (только PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(id=options['user']).first()
+        else:
+            user = User.objects.filter(favorites__isnull=False).first()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден, сначала выполните seed_load'
+            )
+        tags = options['tags'] or list(
+            Tag.objects.values_list('slug', flat=True)[:2]
+        )
+
+        variants = (
+            ('JOIN + DISTINCT', self.join_queryset(user, tags)),
+            ('EXISTS', self.exists_queryset(user, tags)),
+        )
+        start, end = options['offset'], options['offset'] + options['limit']
+        for title, queryset in variants:
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            page = queryset.order_by('name', 'id')[start:end]
+            explain_options = {'analyze': True} if options['analyze'] else {}
+            self.stdout.write(page.explain(**explain_options))
+            self.stdout.write(
+                f'COUNT: {self.timeit(queryset.count, options["repeat"])}'
+            )
+            self.stdout.write(
+                f'Страница: '
+                f'{self.timeit(lambda: list(page.all()), options["repeat"])}'
+            )
+
+    def join_queryset(self, user, tags):
+        """Исходный вариант фильтров"""
+        return Recipe.objects.filter(
+            tags__slug__in=tags,
+            favorited_by__user=user,
+        ).exclude(in_shopping_cart__user=user).distinct()
+
+    def exists_queryset(self, user, tags):
+        return Recipe.objects.filter(
+            Exists(TagRecipe.objects.filter(
+                recipe=OuterRef('pk'), tag__slug__in=tags
+            )),
+            Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            ~Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+    def timeit(self, func, repeat):
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+        durations.sort()
+        median = durations[len(durations) // 2]
+        return f'медиана {median:.2f} мс, максимум {durations[-1]:.2f} мс'
@@ -0,0 +1,99 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/1/',
+    '/api/ingredients/?name=а',
+)
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочное сравнение развертываний (например, gunicorn WSGI '
+        'и uvicorn ASGI): пропускная способность и хвостовые задержки '
+        'при разной конкурентности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True,
+            help='Имя и адрес развертывания: wsgi=http://127.0.0.1:8000'
+        )
+        parser.add_argument(
+            '--path', action='append',
+            help='Путь запроса, можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 10, 50]
+        )
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Число запросов на каждую комбинацию'
+        )
+        parser.add_argument('--token', help='Токен для авторизованных GET')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, separator, url = target.partition('=')
+            if not separator:
+                raise CommandError(f'Ожидается имя=адрес: {target}')
+            targets.append((name, url.rstrip('/')))
+        self.headers = {}
+        if options['token']:
+            self.headers['Authorization'] = f'Token {options["token"]}'
+        self.timeout = options['timeout']
+        self.local = threading.local()
+
+        self.stdout.write(
+            f'{"развертывание":<14}{"путь":<32}{"потоков":>8}{"RPS":>9}'
+            f'{"p50 мс":>9}{"p95 мс":>9}{"p99 мс":>9}{"ошибок":>8}'
+        )
+        for path in options['path'] or DEFAULT_PATHS:
+            for concurrency in options['concurrency']:
+                for name, url in targets:
+                    rps, latencies, errors = self.run(
+                        url + path, concurrency, options['requests']
+                    )
+                    self.stdout.write(
+                        f'{name:<14}{path[:31]:<32}{concurrency:>8}'
+                        f'{rps:>9.1f}'
+                        f'{percentile(latencies, 0.5):>9.1f}'
+                        f'{percentile(latencies, 0.95):>9.1f}'
+                        f'{percentile(latencies, 0.99):>9.1f}'
+                        f'{errors:>8}'
+                    )
+
+    def request(self, url):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.get(
+                url, headers=self.headers, allow_redirects=False,
+                timeout=self.timeout
+            )
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            failed = True
+        return (time.perf_counter() - start) * 1000, failed
+
+    def run(self, url, concurrency, total):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(self.request, [url] * total))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(failed for _, failed in results)
+        return total / elapsed, latencies, errors
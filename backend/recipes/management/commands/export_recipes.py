@@ -0,0 +1,149 @@
+import json
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from recipes.management.utils import MEDIA_FILE, RECIPES_FILE, batches
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+def read_file(name):
+    """Содержимое файла из хранилища или None, если файла нет"""
+    try:
+        with default_storage.open(name, 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая выгрузка рецептов с авторами, тегами и ингредиентами '
+        'в NDJSON и их изображений в tar-архив для переноса между '
+        'окружениями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', type=Path,
+            help=f'Каталог для {RECIPES_FILE} и {MEDIA_FILE}'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за один запрос'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков, читающих изображения из хранилища'
+        )
+        parser.add_argument(
+            '--no-media', action='store_true',
+            help='Не выгружать изображения'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        output.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = options['chunk_size']
+        self.counts = dict.fromkeys(
+            ('authors', 'tags', 'recipes', 'files', 'missing'), 0
+        )
+        self.media = None
+        if not options['no_media']:
+            self.media = tarfile.open(output / MEDIA_FILE, 'w')
+        executor = ThreadPoolExecutor(max_workers=options['workers'])
+        try:
+            with (output / RECIPES_FILE).open(
+                'w', encoding='utf8'
+            ) as self.file, executor as self.executor:
+                self.export_authors()
+                self.export_tags()
+                self.export_recipes()
+        finally:
+            if self.media is not None:
+                self.media.close()
+        self.stdout.write(self.style.SUCCESS(
+            'Выгружено авторов: {authors}, тегов: {tags}, рецептов: '
+            '{recipes}, файлов: {files}, не найдено файлов: '
+            '{missing}'.format(**self.counts)
+        ))
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def export_authors(self):
+        authors = User.objects.filter(
+            Exists(Recipe.objects.filter(author=OuterRef('pk')))
+        ).order_by('id').only(
+            'email', 'username', 'first_name', 'last_name', 'avatar'
+        )
+        for batch in batches(
+            authors.iterator(chunk_size=self.chunk_size), self.chunk_size
+        ):
+            for author in batch:
+                self.write({
+                    'type': 'author',
+                    'email': author.email,
+                    'username': author.username,
+                    'first_name': author.first_name,
+                    'last_name': author.last_name,
+                    'avatar': author.avatar.name or None,
+                })
+            self.copy_media(author.avatar.name for author in batch)
+            self.counts['authors'] += len(batch)
+
+    def export_tags(self):
+        for tag in Tag.objects.order_by('id').iterator():
+            self.write({'type': 'tag', 'name': tag.name, 'slug': tag.slug})
+            self.counts['tags'] += 1
+
+    def export_recipes(self):
+        recipes = Recipe.objects.with_related().order_by('id')
+        for batch in batches(
+            recipes.iterator(chunk_size=self.chunk_size), self.chunk_size
+        ):
+            for recipe in batch:
+                self.write({
+                    'type': 'recipe',
+                    'author': recipe.author.email,
+                    'name': recipe.name,
+                    'text': recipe.text,
+                    'cooking_time': recipe.cooking_time,
+                    'image': recipe.image.name or None,
+                    'tags': [tag.slug for tag in recipe.tags.all()],
+                    'ingredients': [
+                        {
+                            'name': item.ingredient.name,
+                            'measurement_unit':
+                                item.ingredient.measurement_unit,
+                            'amount': item.amount,
+                        }
+                        for item in recipe.ingredientrecipe_set.all()
+                    ],
+                })
+            self.copy_media(recipe.image.name for recipe in batch)
+            self.counts['recipes'] += len(batch)
+            self.stdout.write(f'Рецептов выгружено: {self.counts["recipes"]}')
+
+    def copy_media(self, names):
+        """
+        Читает файлы пачки параллельно и дописывает их в архив
+        в исходном порядке; в памяти не больше одной пачки файлов
+        """
+        if self.media is None:
+            return
+        names = list(dict.fromkeys(name for name in names if name))
+        for name, data in zip(names, self.executor.map(read_file, names)):
+            if data is None:
+                self.counts['missing'] += 1
+                self.stderr.write(f'Файл не найден: {name}')
+                continue
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            self.media.addfile(info, BytesIO(data))
+            self.counts['files'] += 1
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.images import generate_variants
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Создание уменьшенных копий изображений рецептов и аватаров, '
+        'у которых их еще нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии для всех изображений'
+        )
+
+    def handle(self, *args, **options):
+        targets = (
+            (Recipe, 'image', 'image_variants', settings.RECIPE_IMAGE_SIZES),
+            (User, 'avatar', 'avatar_variants', settings.AVATAR_IMAGE_SIZES),
+        )
+        for model, image_field, variants_field, sizes in targets:
+            queryset = model.objects.exclude(
+                **{f'{image_field}__isnull': True}
+            ).exclude(**{image_field: ''})
+            if options['force']:
+                queryset.update(**{variants_field: {}})
+            pks = list(queryset.values_list('pk', flat=True))
+            for pk in pks:
+                generate_variants(
+                    model._meta.label, pk, image_field, variants_field, sizes
+                )
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {len(pks)}'
+            )
@@ -1,27 +1,246 @@
 import csv
+import io
+import json
+import time
+from pathlib import Path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from recipes.models import Ingredient
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipes.catalogs import bump_catalog_version
+from recipes.ingredient_index import ingredient_index
+from recipes.management.utils import batches
+from recipes.models import Ingredient, Tag
+from recipes.response_cache import GLOBAL, bump_versions
+
+# Справочник: модель, уникальное поле, обновляемые поля,
+# порядок столбцов CSV и файл по умолчанию
+CATALOGS = {
+    'ingredients': (
+        Ingredient, 'name', ('measurement_unit',),
+        ('name', 'measurement_unit'), 'ingredients.csv'
+    ),
+    'tags': (Tag, 'slug', ('name',), ('name', 'slug'), 'tags.csv'),
+}
+FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+DIFF_EXAMPLES = 10
+
+
+def read_csv(file, columns):
+    """Строки CSV без заголовка, столбцы в порядке columns"""
+    for row in csv.reader(file):
+        yield dict(zip(columns, row))
+
+
+def read_json(file, columns):
+    """JSON-массив объектов; файл читается целиком"""
+    yield from json.load(file)
+
+
+def read_ndjson(file, columns):
+    """Один JSON-объект на строку, файл читается потоково"""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'ndjson': read_ndjson,
+}
 
 
 class Command(BaseCommand):
-    help = 'Импорт данных из csv-файла в базу данных.'
-
-    def handle(self, *args, **kwargs):
-        csv_file_path = settings.CSV_FILES_DIR / 'ingredients.csv'
-        model = Ingredient
-        self.stdout.write(f'Начинаем импорт из файла {csv_file_path}')
-        with csv_file_path.open(mode='r', encoding='utf8') as f:
-            reader = csv.reader(f)
-            objects_to_create = [
-                model(name=row[0], measurement_unit=row[1])
-                for row in reader
-            ]
-            model.objects.bulk_create(
-                objects_to_create,
-                ignore_conflicts=True
+    help = (
+        'Импорт ингредиентов или тегов из CSV, JSON или NDJSON. '
+        'Строки читаются пачками и вставляются или обновляются '
+        'по уникальному полю (upsert).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'catalog', nargs='?', choices=CATALOGS, default='ingredients'
+        )
+        parser.add_argument(
+            '--file', type=Path,
+            help='Файл с данными, по умолчанию из каталога data'
+        )
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='Формат файла, по умолчанию по расширению'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Показать, что изменится, ничего не записывая'
+        )
+
+    def handle(self, *args, **options):
+        (
+            self.model, self.key, self.update_fields, columns, default_file
+        ) = CATALOGS[options['catalog']]
+        self.fields = (self.key, *self.update_fields)
+        path = options['file'] or settings.CSV_FILES_DIR / default_file
+        if not path.exists():
+            raise CommandError(f'Файл {path} не найден')
+        file_format = options['format'] or FORMATS.get(path.suffix.lower())
+        if file_format is None:
+            raise CommandError(
+                f'Не удалось определить формат {path}, укажите --format'
             )
+        use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        dry_run = options['dry_run']
+        if dry_run:
+            mode = 'пробный запуск'
+        else:
+            mode = 'COPY' if use_copy else 'bulk_create'
+
+        self.stdout.write(
+            f'Импорт {options["catalog"]} из {path} ({file_format}, {mode})'
+        )
+        self.totals = dict.fromkeys(
+            ('created', 'updated', 'unchanged', 'skipped'), 0
+        )
+        self.examples = []
+        start = time.perf_counter()
+        processed = 0
+        with path.open(mode='r', encoding='utf8', newline='') as file:
+            rows = READERS[file_format](file, columns)
+            for batch in batches(rows, options['batch_size']):
+                changed = self.diff(self.clean(batch))
+                if changed and not dry_run:
+                    with transaction.atomic():
+                        if use_copy:
+                            self.copy_upsert(changed)
+                        else:
+                            self.bulk_upsert(changed)
+                processed += len(batch)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'Обработано строк: {processed} '
+                    f'({processed / elapsed:.0f} строк/с)'
+                )
+
+        if dry_run:
+            for line in self.examples:
+                self.stdout.write(line)
+        elif self.totals['created'] or self.totals['updated']:
+            self.invalidate_caches(options['catalog'])
+        elapsed = time.perf_counter() - start
         self.stdout.write(self.style.SUCCESS(
-            'Все данные загружены в базу')
+            'Добавлено: {created}, обновлено: {updated}, без изменений: '
+            '{unchanged}, пропущено: {skipped}'.format(**self.totals)
+            + f' за {elapsed:.1f} с'
+        ))
+
+    def clean(self, batch):
+        """
+        Оставляет строки с заполненными полями; повторы ключа
+        внутри пачки схлопываются, побеждает последняя строка
+        """
+        rows = {}
+        for row in batch:
+            values = {
+                field: str(row.get(field) or '').strip()
+                for field in self.fields
+            }
+            if not all(values.values()):
+                self.totals['skipped'] += 1
+                continue
+            rows[values[self.key]] = values
+        return rows
+
+    def diff(self, rows):
+        """
+        Сравнивает пачку с базой одним запросом и возвращает
+        только новые и измененные строки
+        """
+        existing = self.model.objects.filter(
+            **{f'{self.key}__in': list(rows)}
+        ).values(*self.fields)
+        existing = {row[self.key]: row for row in existing}
+        changed = []
+        for key, values in rows.items():
+            old = existing.get(key)
+            if old is None:
+                self.totals['created'] += 1
+                self.add_example(f'+ {key}: {values}')
+            elif old != values:
+                self.totals['updated'] += 1
+                self.add_example(f'~ {key}: {old} -> {values}')
+            else:
+                self.totals['unchanged'] += 1
+                continue
+            changed.append(values)
+        return changed
+
+    def add_example(self, line):
+        if len(self.examples) < DIFF_EXAMPLES:
+            self.examples.append(line)
+
+    def bulk_upsert(self, rows):
+        self.model.objects.bulk_create(
+            [self.model(**values) for values in rows],
+            update_conflicts=True,
+            unique_fields=(self.key,),
+            update_fields=self.update_fields,
         )
+
+    def copy_upsert(self, rows):
+        """
+        Быстрый путь для PostgreSQL: пачка загружается COPY
+        во временную таблицу и переносится одним INSERT ... ON CONFLICT
+        """
+        table = self.model._meta.db_table
+        columns = ', '.join(
+            self.model._meta.get_field(field).column for field in self.fields
+        )
+        key = self.model._meta.get_field(self.key).column
+        updates = ', '.join(
+            f'{column} = EXCLUDED.{column}' for column in (
+                self.model._meta.get_field(field).column
+                for field in self.update_fields
+            )
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(
+            [values[field] for field in self.fields] for values in rows
+        )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS import_rows '
+                f'ON COMMIT DROP AS SELECT {columns} FROM {table} '
+                f'WITH NO DATA'
+            )
+            cursor.execute('TRUNCATE import_rows')
+            cursor.copy_expert(
+                f'COPY import_rows ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM import_rows '
+                f'ON CONFLICT ({key}) DO UPDATE SET {updates}'
+            )
+
+    def invalidate_caches(self, catalog):
+        """bulk-запись обходит сигналы, поэтому кэши сбрасываются явно"""
+        if catalog == 'ingredients':
+            ingredient_index.invalidate()
+        else:
+            bump_catalog_version(catalog)
+        bump_versions(GLOBAL)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from recipes.counters import count_subquery
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет денормализованных счетчиков рецептов и пользователей: '
+        'избранного, списков покупок, рецептов и подписчиков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Размер диапазона id, пересчитываемого одним UPDATE'
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.recount(
+            Recipe,
+            favorites_count=count_subquery(Favorite, 'recipe'),
+            in_carts_count=count_subquery(ShoppingCart, 'recipe'),
+        )
+        self.recount(
+            User,
+            recipes_count=count_subquery(Recipe, 'author'),
+            followers_count=count_subquery(Subscribe, 'following'),
+        )
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны'))
+
+    def recount(self, model, **counters):
+        max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        updated = 0
+        for start in range(0, max_id + 1, self.batch_size):
+            with transaction.atomic():
+                updated += model.objects.filter(
+                    id__gte=start, id__lt=start + self.batch_size
+                ).update(**counters)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: обновлено {updated}'
+        )
@@ -0,0 +1,204 @@
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes.feed import rebuild_feed
+from recipes.management.utils import batches
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag, TagRecipe)
+from users.models import Subscribe, User
+
+SEED_TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+    ('Десерт', 'dessert'),
+    ('Выпечка', 'bakery'),
+    ('Напитки', 'drinks'),
+)
+USERNAME_PREFIX = 'load_user_'
+PASSWORD = 'foodgram_load'
+
+
+def power_law_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для random.choices"""
+    return list(itertools.accumulate(
+        1 / (rank ** exponent) for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация синтетических пользователей, рецептов, избранного, '
+        'списков покупок и подписок для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число рецептов в избранном у пользователя'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее число рецептов в списке покупок у пользователя'
+        )
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Среднее число подписок у пользователя'
+        )
+        parser.add_argument('--exponent', type=float, default=1.1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.exponent = options['exponent']
+
+        ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        if not ingredient_ids:
+            raise CommandError(
+                'Ингредиенты не найдены, сначала выполните importcsv'
+            )
+        tag_ids = self.create_tags()
+
+        user_ids = self.create_users(options['users'])
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, tag_ids, ingredient_ids
+        )
+        self.create_edges(
+            Favorite, 'recipe', user_ids, recipe_ids, options['favorites']
+        )
+        self.create_edges(
+            ShoppingCart, 'recipe', user_ids, recipe_ids, options['carts']
+        )
+        self.create_edges(
+            Subscribe, 'following', user_ids, user_ids, options['follows']
+        )
+        call_command('repair_counters', stdout=self.stdout)
+        rebuild_feed()
+        self.stdout.write(self.style.SUCCESS('Тестовые данные созданы'))
+
+    def create_tags(self):
+        for name, slug in SEED_TAGS:
+            Tag.objects.get_or_create(slug=slug, defaults={'name': name})
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        start = User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).count()
+        password = make_password(PASSWORD)
+        users = (
+            User(
+                username=f'{USERNAME_PREFIX}{number}',
+                email=f'{USERNAME_PREFIX}{number}@example.com',
+                first_name='Тест',
+                last_name=f'Пользователь {number}',
+                password=password,
+            )
+            for number in range(start, start + count)
+        )
+        user_ids = []
+        for batch in batches(users, self.batch_size):
+            user_ids.extend(
+                user.id for user in User.objects.bulk_create(batch)
+            )
+        self.stdout.write(f'Пользователей создано: {len(user_ids)}')
+        return user_ids
+
+    def create_recipes(self, count, user_ids, tag_ids, ingredient_ids):
+        author_weights = power_law_weights(len(user_ids), self.exponent)
+        tag_weights = power_law_weights(len(tag_ids), self.exponent)
+        ingredient_weights = power_law_weights(
+            len(ingredient_ids), self.exponent
+        )
+        recipe_ids = []
+        for batch_start in range(0, count, self.batch_size):
+            batch_size = min(self.batch_size, count - batch_start)
+            authors = self.random.choices(
+                user_ids, cum_weights=author_weights, k=batch_size
+            )
+            with transaction.atomic():
+                recipes = Recipe.objects.bulk_create(
+                    Recipe(
+                        name=f'Рецепт {batch_start + number}',
+                        text='Синтетический рецепт для нагрузочного теста',
+                        cooking_time=self.random.randint(5, 180),
+                        author_id=author_id,
+                    )
+                    for number, author_id in enumerate(authors)
+                )
+                tag_links = []
+                ingredient_links = []
+                for recipe in recipes:
+                    tags = self.sample(
+                        tag_ids, tag_weights, self.random.randint(1, 3)
+                    )
+                    tag_links.extend(
+                        TagRecipe(recipe_id=recipe.id, tag_id=tag_id)
+                        for tag_id in tags
+                    )
+                    ingredients = self.sample(
+                        ingredient_ids, ingredient_weights,
+                        self.random.randint(3, 12)
+                    )
+                    ingredient_links.extend(
+                        IngredientRecipe(
+                            recipe_id=recipe.id,
+                            ingredient_id=ingredient_id,
+                            amount=self.random.randint(1, 500)
+                        )
+                        for ingredient_id in ingredients
+                    )
+                TagRecipe.objects.bulk_create(tag_links)
+                IngredientRecipe.objects.bulk_create(
+                    ingredient_links, batch_size=self.batch_size
+                )
+            recipe_ids.extend(recipe.id for recipe in recipes)
+            self.stdout.write(f'Рецептов создано: {len(recipe_ids)}')
+        return recipe_ids
+
+    def create_edges(self, model, target_field, user_ids, target_ids, mean):
+        """
+        Создает связи пользователь -> объект. Число связей у пользователя
+        и популярность объектов подчиняются степенному закону
+        """
+        target_weights = power_law_weights(len(target_ids), self.exponent)
+        created = 0
+        for user_batch in batches(user_ids, self.batch_size):
+            edges = []
+            for user_id in user_batch:
+                count = min(
+                    int(self.random.paretovariate(2) * mean / 2),
+                    len(target_ids)
+                )
+                targets = self.sample(target_ids, target_weights, count)
+                if target_field == 'following':
+                    targets.discard(user_id)
+                edges.extend(
+                    model(user_id=user_id, **{f'{target_field}_id': target})
+                    for target in targets
+                )
+            model.objects.bulk_create(
+                edges, batch_size=self.batch_size, ignore_conflicts=True
+            )
+            created += len(edges)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {created}')
+
+    def sample(self, population, cum_weights, count):
+        """Выборка без повторов с учетом весов"""
+        count = min(count, len(population))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(self.random.choices(
+                population, cum_weights=cum_weights, k=count - len(chosen)
+            ))
+        return chosen
@@ -0,0 +1,12 @@
+import itertools
+
+# Файлы выгрузки export_recipes / import_recipes
+RECIPES_FILE = 'recipes.ndjson'
+MEDIA_FILE = 'media.tar'
+
+
+def batches(iterable, size):
+    """Разбивает итерируемый объект на списки не длиннее size"""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.14 on 2026-10-18 04:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_feed(apps, schema_editor):
+    """Авторы с большим числом подписчиков в ленты не раскладываются"""
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Subscribe = apps.get_model('users', 'Subscribe')
+    User = apps.get_model('users', 'User')
+    schema_editor.execute(
+        f'INSERT INTO {FeedEntry._meta.db_table} '
+        f'(user_id, recipe_id, author_id) '
+        f'SELECT subscribe.user_id, recipe.id, recipe.author_id '
+        f'FROM {Subscribe._meta.db_table} AS subscribe '
+        f'JOIN {User._meta.db_table} AS author '
+        f'ON author.id = subscribe.following_id '
+        f'JOIN {Recipe._meta.db_table} AS recipe '
+        f'ON recipe.author_id = subscribe.following_id '
+        f'WHERE author.followers_count <= %s '
+        f'ON CONFLICT DO NOTHING',
+        [settings.FEED_FANOUT_LIMIT]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0012_recipe_counters'),
+        ('users', '0010_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+                'indexes': [models.Index(fields=['user', 'author'], name='feed_entry_user_author_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
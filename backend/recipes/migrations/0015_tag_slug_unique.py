@@ -0,0 +1,35 @@
+# Generated by Django 4.2.14 on 2026-10-18 04:52
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    Tag = apps.get_model('recipes', 'Tag')
+    TagRecipe = apps.get_model('recipes', 'TagRecipe')
+    duplicates = Tag.objects.values('slug').annotate(
+        keep_id=Min('id'), count=Count('id')
+    ).filter(count__gt=1)
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        tags = Tag.objects.filter(slug=duplicate['slug']).exclude(id=keep_id)
+        tagged = TagRecipe.objects.filter(tag_id=keep_id).values('recipe')
+        TagRecipe.objects.filter(tag__in=tags, recipe__in=tagged).delete()
+        TagRecipe.objects.filter(tag__in=tags).update(tag_id=keep_id)
+        tags.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='slug',
+            field=models.SlugField(unique=True, verbose_name='Слаг'),
+        ),
+    ]
@@ -1,23 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from recipes.catalogs import (catalog_conditional_response,
+                              get_catalog_version, patch_catalog_headers)
 from recipes.models import Favorite, ShoppingCart
+from recipes.response_cache import GLOBAL, LIST, response_key
 from rest_framework import serializers
+from rest_framework.response import Response
 
 
 class RecipeStatusMixin(serializers.Serializer):
     """
     Миксин для проверки статуса, добавлен ли
-    рецепт в избранное или список покупок
+    рецепт в избранное или список покупок.
+    Если queryset уже аннотирован флагами, дополнительных запросов нет
     """
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context['request'].user
         return user.is_authenticated and Favorite.objects.filter(
             user=user, recipe=obj
         ).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
         return user.is_authenticated and ShoppingCart.objects.filter(
             user=user, recipe=obj
         ).exists()
+
+
+class CatalogCacheMixin:
+    """
+    Миксин для представлений справочников с условными GET-запросами.
+    ETag и Last-Modified берутся из версии каталога в кэше, поэтому
+    ответ 304 отдается без обращения к базе данных и сериализатору
+    """
+    catalog = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified, response = catalog_conditional_response(
+            request, self.catalog, get_catalog_version(self.catalog)
+        )
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return patch_catalog_headers(response, etag, last_modified)
+
+
+class RecipeResponseCacheMixin:
+    """
+    Кэш ответов списка и карточки рецепта для анонимных пользователей.
+    Ключ строится по нормализованной строке запроса и версиям рецепта
+    и справочников, которые меняются сигналами моделей, поэтому
+    попадание в кэш обходится без ORM и сериализатора
+    """
+
+    def cached_response(self, request, scopes, get_response):
+        if request.user.is_authenticated:
+            return get_response()
+        key = response_key(request, *scopes)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = get_response()
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RECIPE_RESPONSE_CACHE_TTL)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, (GLOBAL, LIST),
+            lambda: super(RecipeResponseCacheMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, (GLOBAL, kwargs[self.lookup_field]),
+            lambda: super(RecipeResponseCacheMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
@@ -1,9 +1,15 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField,
+                                            TrigramWordSimilarity)
 from django.db import models
+from recipes.counters import CounterFieldsMixin
 from recipes.validators import validation_cooking_time
-from users.models import User
+from users.models import Subscribe, User
 
 LENG_NAME = 200
 LENG_UNIT = 100
+SEARCH_CONFIG = 'russian'
 
 
 class Ingredient(models.Model):
@@ -35,7 +41,7 @@ class Ingredient(models.Model):
 class Tag(models.Model):
     """Модель тега"""
     name = models.CharField(verbose_name='Название', max_length=100)
-    slug = models.SlugField(verbose_name='Слаг')
+    slug = models.SlugField(verbose_name='Слаг', unique=True)
 
     class Meta:
         verbose_name = 'Тег'
@@ -46,8 +52,60 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    """Queryset рецептов с заготовками для сериализаторов"""
+
+    def with_user_flags(self, user):
+        """
+        Аннотирует флаги избранного, списка покупок и подписки
+        на автора для текущего пользователя
+        """
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            author_is_subscribed=models.Exists(Subscribe.objects.filter(
+                user=user, following=models.OuterRef('author')
+            )),
+        )
+
+    def search(self, value):
+        """
+        Полнотекстовый поиск по названию и описанию с ранжированием.
+        Названия с опечатками находятся через триграммы и идут после
+        полнотекстовых совпадений
+        """
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return self.filter(
+            models.Q(search_vector=query)
+            | models.Q(name__trigram_word_similar=value)
+        ).annotate(
+            rank=SearchRank(models.F('search_vector'), query),
+            similarity=TrigramWordSimilarity(value, 'name'),
+        ).order_by('-rank', '-similarity', 'id')
+
+    def with_related(self):
+        """Подгружает автора, теги и ингредиенты без запросов на строку"""
+        return self.select_related('author').prefetch_related(
+            models.Prefetch('tags', queryset=Tag.objects.all()),
+            models.Prefetch(
+                'ingredientrecipe_set',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            ),
+        )
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецепта"""
+
+    counter_fields = ('favorites_count', 'in_carts_count')
     ingredients = models.ManyToManyField(
         Ingredient, through='IngredientRecipe',
         verbose_name='Ингредиент',
@@ -64,6 +122,10 @@ class Recipe(models.Model):
         default=None,
         verbose_name='Изображение'
     )
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False,
+        verbose_name='Уменьшенные копии изображения'
+    )
     name = models.CharField(max_length=256, verbose_name='Название')
     text = models.TextField(verbose_name='Описание')
     cooking_time = models.PositiveIntegerField(
@@ -79,18 +141,41 @@ class Recipe(models.Model):
         max_length=22, unique=True, null=True,
         verbose_name='Короткая ссылка'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Добавлен в избранное (раз)'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Добавлен в список покупок (раз)'
+    )
+    search_vector = SearchVectorField(
+        null=True, editable=False,
+        verbose_name='Поисковый вектор'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('name',)
+        indexes = [
+            GinIndex(
+                fields=['search_vector'], name='recipe_search_vector_idx'
+            ),
+            GinIndex(
+                fields=['name'], name='recipe_name_trgm_idx',
+                opclasses=['gin_trgm_ops']
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
     def favorited_count(self):
         """Показывает сколько раз рецепт был добавлен в избранное."""
-        return self.favorited_by.count()
+        return self.favorites_count
 
 
 class TagRecipe(models.Model):
@@ -154,3 +239,40 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user.username} {self.recipe.name}'
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: рецепт автора, на которого подписан user"""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'], name='feed_entry_user_author_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+
+    def __str__(self):
+        return f'{self.user_id} {self.recipe_id}'
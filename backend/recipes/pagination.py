@@ -0,0 +1,189 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from recipes.feed import get_feed_recipe_ids
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Базовый класс пагинации по ключу последней строки страницы"""
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    invalid_cursor_message = 'Некорректный курсор'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        if page_size <= 0:
+            return api_settings.PAGE_SIZE
+        return min(page_size, self.max_page_size)
+
+
+class RecipeCursorPagination(KeysetPagination):
+    """
+    Курсорная (keyset) пагинация рецептов по стабильному порядку (name, id).
+    Курсор хранит ключ последней строки, поэтому стоимость запроса
+    не зависит от глубины прокрутки
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            reverse = False
+            queryset = queryset.order_by('name', 'id')
+        else:
+            name, pk, reverse = self.cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(name__lt=name) | Q(name=name, id__lt=pk)
+                ).order_by('-name', '-id')
+            else:
+                queryset = queryset.filter(
+                    Q(name__gt=name) | Q(name=name, id__gt=pk)
+                ).order_by('name', 'id')
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else self.cursor is not None
+        self.page = results
+        return results
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            name, pk, reverse = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii'))
+            )
+            return str(name), int(pk), bool(reverse)
+        except (binascii.Error, TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, recipe, reverse):
+        payload = json.dumps(
+            [recipe.name, recipe.pk, reverse], ensure_ascii=False
+        )
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8'))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode('ascii')
+        )
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Пагинация ленты подписок по убыванию id рецепта.
+    Следующая страница запрашивается с параметром before=<id>
+    """
+    cursor_query_param = 'before'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        try:
+            before = request.query_params.get(self.cursor_query_param)
+            before = int(before) if before is not None else None
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        recipe_ids = get_feed_recipe_ids(request.user, before, page_size + 1)
+        self.has_next = len(recipe_ids) > page_size
+        recipe_ids = recipe_ids[:page_size]
+        recipes = queryset.order_by().in_bulk(recipe_ids)
+        self.page = [
+            recipes[recipe_id] for recipe_id in recipe_ids
+            if recipe_id in recipes
+        ]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.page[-1].pk
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class RecipePagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset для старых клиентов.
+    Курсорный режим включается параметром ?pagination=cursor,
+    следующие страницы запрашиваются по ссылкам с параметром cursor.
+    Поиск всегда отдается limit/offset: курсор по (name, id)
+    потерял бы сортировку по релевантности
+    """
+    cursor_pagination_class = RecipeCursorPagination
+    cursor_mode_query_param = 'pagination'
+    cursor_mode_value = 'cursor'
+    search_query_param = 'search'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        if request.query_params.get(self.search_query_param):
+            return False
+        return (
+            self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+            or request.query_params.get(self.cursor_mode_query_param)
+            == self.cursor_mode_value
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,70 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'recipe_cache_version:{}'
+RESPONSE_KEY = 'recipe_response:{}'
+# Справочники и авторы: меняют вывод любого рецепта
+GLOBAL = 'global'
+# Состав рецептов: меняет страницы списка
+LIST = 'list'
+
+
+def bump_versions(*scopes):
+    """
+    Меняет версии после коммита транзакции, чтобы параллельный
+    запрос не сохранил в кэш старые данные под новой версией
+    """
+    transaction.on_commit(lambda: cache.set_many(
+        {VERSION_KEY.format(scope): uuid.uuid4().hex for scope in scopes},
+        timeout=None
+    ))
+
+
+def get_versions(*scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+async def aget_versions(*scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+        versions.update(await cache.aget_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+def normalize_query(query_dict):
+    """Строка запроса без учета порядка параметров и их значений"""
+    return urlencode(
+        sorted((key, sorted(values)) for key, values in query_dict.lists()),
+        doseq=True
+    )
+
+
+def build_response_key(request, versions):
+    raw = '|'.join((
+        request.scheme, request.get_host(), request.path,
+        normalize_query(request.GET), *versions
+    ))
+    return RESPONSE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def response_key(request, *scopes):
+    return build_response_key(request, get_versions(*scopes))
+
+
+async def aresponse_key(request, *scopes):
+    return build_response_key(request, await aget_versions(*scopes))
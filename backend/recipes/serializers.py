@@ -1,7 +1,9 @@
 import base64
 
-import shortuuid
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
 from recipes.mixins import RecipeStatusMixin
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag, TagRecipe)
@@ -10,6 +12,11 @@ from rest_framework import serializers
 from users.models import Subscribe, User
 
 LENG_NAME = 256
+MAX_BULK_IDS = 100
+# Наибольшее значение bigint: больший id дает ошибку базы, а не 400
+MAX_ID = 9223372036854775807
+# Наибольшее значение PositiveIntegerField в PostgreSQL
+MAX_AMOUNT = 2147483647
 
 
 class Base64ImageField(serializers.ImageField):
@@ -24,6 +31,47 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class ImageVariantsField(serializers.Field):
+    """
+    Карта производных изображений в стиле srcset:
+    {размер: {формат: url}}. Если копия еще не создана,
+    отдается ссылка на оригинал
+    """
+    def __init__(self, image_field, variants_field, sizes, **kwargs):
+        self.image_field = image_field
+        self.variants_field = variants_field
+        self.sizes = sizes
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def build_url(self, url):
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        if not image:
+            return None
+        variants = getattr(instance, self.variants_field) or {}
+        if variants.get('source') != image.name:
+            variants = {}
+        original = self.build_url(image.url)
+        return {
+            size: {
+                image_format: (
+                    self.build_url(default_storage.url(name))
+                    if (name := variants.get(size, {}).get(image_format))
+                    else original
+                )
+                for image_format in settings.IMAGE_VARIANT_FORMATS
+            }
+            for size in self.sizes
+        }
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор для тегов."""
 
@@ -61,16 +109,21 @@ class AuthorSerializer(serializers.ModelSerializer):
     """Сериализатор для автора рецепта"""
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.ImageField()
+    avatar_srcset = ImageVariantsField(
+        'avatar', 'avatar_variants', settings.AVATAR_IMAGE_SIZES
+    )
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'username', 'first_name',
-            'last_name', 'avatar', 'is_subscribed'
+            'last_name', 'avatar', 'avatar_srcset', 'is_subscribed'
         )
 
     def get_is_subscribed(self, obj):
         """Проверка подписки"""
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Subscribe.objects.filter(
@@ -86,26 +139,56 @@ class RecipeReadSerializer(RecipeStatusMixin, serializers.ModelSerializer):
     )
     tags = TagSerializer(many=True, read_only=True)
     author = AuthorSerializer(read_only=True)
+    image_srcset = ImageVariantsField(
+        'image', 'image_variants', settings.RECIPE_IMAGE_SIZES
+    )
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image',
+            'is_in_shopping_cart', 'name', 'image', 'image_srcset',
             'text', 'cooking_time'
         )
 
+    def to_representation(self, instance):
+        """Передает аннотацию подписки на автора в AuthorSerializer"""
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
+
+def does_not_exist(pk):
+    return serializers.PrimaryKeyRelatedField.default_error_messages[
+        'does_not_exist'
+    ].format(pk_value=pk)
+
+
+class IngredientAmountSerializer(serializers.Serializer):
+    """
+    Сериализатор ингредиента рецепта при записи.
+    Существование ингредиентов проверяется одним запросом
+    в RecipeCreateSerizalizer.validate
+    """
+    id = serializers.IntegerField(min_value=1, max_value=MAX_ID)
+    amount = serializers.IntegerField(
+        min_value=1, max_value=MAX_AMOUNT,
+        error_messages={
+            'min_value': 'Количество ингредиента должно быть больше 0'
+        }
+    )
+
 
 class RecipeCreateSerizalizer(RecipeStatusMixin, serializers.ModelSerializer):
     """Сериализатор для создания рецептов"""
     author = serializers.HiddenField(default=serializers.CurrentUserDefault())
-    ingredients = IngredientRecipeSerializer(
+    ingredients = IngredientAmountSerializer(
         many=True, write_only=True,
         label='Ингредиенты',
         required=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True,
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
         write_only=True, label='Теги',
         required=True
     )
@@ -134,7 +217,8 @@ class RecipeCreateSerizalizer(RecipeStatusMixin, serializers.ModelSerializer):
     def validate(self, data):
         """
         Проверка на отсутствие повторяющихся тегов
-        и ингредиентов, их нулевое количество
+        и ингредиентов, их нулевое количество.
+        Теги и ингредиенты загружаются одним запросом на каждую таблицу
         """
         tags = data.get('tags', [])
         if not tags:
@@ -147,9 +231,7 @@ class RecipeCreateSerizalizer(RecipeStatusMixin, serializers.ModelSerializer):
             )
 
         ingredients = data.get('ingredients', [])
-        ingredient_list = [
-            ingredient['ingredient'].id for ingredient in ingredients
-        ]
+        ingredient_list = [ingredient['id'] for ingredient in ingredients]
         if not ingredients:
             raise serializers.ValidationError(
                 "Ингредиенты обязательны для заполнения."
@@ -159,13 +241,47 @@ class RecipeCreateSerizalizer(RecipeStatusMixin, serializers.ModelSerializer):
                 "Ингредиенты не могут использоваться повторно"
             )
 
-        for ingredient_data in ingredients:
-            if ingredient_data.get('amount') <= 0:
-                raise serializers.ValidationError(
-                    "Количество ингредиента должно быть больше 0"
-                )
+        # Ошибки несуществующих объектов в том же виде,
+        # что давал PrimaryKeyRelatedField
+        tags_by_id = Tag.objects.in_bulk(tags)
+        missing_tags = [tag for tag in tags if tag not in tags_by_id]
+        if missing_tags:
+            raise serializers.ValidationError(
+                {'tags': [does_not_exist(missing_tags[0])]}
+            )
+        ingredients_by_id = Ingredient.objects.in_bulk(ingredient_list)
+        if len(ingredients_by_id) != len(ingredient_list):
+            raise serializers.ValidationError({'ingredients': [
+                {} if ingredient in ingredients_by_id
+                else {'id': [does_not_exist(ingredient)]}
+                for ingredient in ingredient_list
+            ]})
+
+        data['tags'] = [tags_by_id[tag] for tag in tags]
+        data['ingredients'] = [
+            {
+                'ingredient': ingredients_by_id[ingredient_data['id']],
+                'amount': ingredient_data['amount'],
+            }
+            for ingredient_data in ingredients
+        ]
         return data
 
+    def set_tags_and_ingredients(self, recipe, tags_data, ingredients_data):
+        """Записывает связи рецепта двумя запросами bulk_create"""
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag=tag) for tag in tags_data
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient=ingredient_data['ingredient'],
+                amount=ingredient_data['amount']
+            )
+            for ingredient_data in ingredients_data
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
@@ -176,25 +292,11 @@ class RecipeCreateSerizalizer(RecipeStatusMixin, serializers.ModelSerializer):
             )
 
         recipe = Recipe.objects.create(**validated_data)
-        # Создание короткой ссылки
-        if not validated_data.get('short_link'):
-            validated_data['short_link'] = shortuuid.uuid()
-
-        for tag in tags_data:
-            TagRecipe.objects.create(recipe=recipe, tag=tag)
-
-        for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data.get('ingredient').id
-            ingredient = Ingredient.objects.get(id=ingredient_id)
-
-            IngredientRecipe.objects.create(
-                recipe=recipe,
-                ingredient=ingredient,
-                amount=ingredient_data.get('amount', 1)
-            )
 
+        self.set_tags_and_ingredients(recipe, tags_data, ingredients_data)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
@@ -205,27 +307,11 @@ class RecipeCreateSerizalizer(RecipeStatusMixin, serializers.ModelSerializer):
             'cooking_time', instance.cooking_time
         )
         instance.image = validated_data.get('image', instance.image)
-        instance.save()
-
-        if not instance.short_link:
-            instance.short_link = shortuuid.uuid()
-
-        if tags_data:
-            tag_ids = [tag.id for tag in tags_data]
-            existing_tags = Tag.objects.filter(id__in=tag_ids)
-            instance.tags.set(existing_tags)
+        instance.save(update_fields=['name', 'text', 'cooking_time', 'image'])
 
+        TagRecipe.objects.filter(recipe=instance).delete()
         IngredientRecipe.objects.filter(recipe=instance).delete()
-
-        for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data.get('ingredient').id
-            ingredient = Ingredient.objects.get(id=ingredient_id)
-            IngredientRecipe.objects.create(
-                recipe=instance,
-                ingredient=ingredient,
-                amount=ingredient_data.get('amount', 1)
-            )
-
+        self.set_tags_and_ingredients(instance, tags_data, ingredients_data)
         return instance
 
 
@@ -234,15 +320,29 @@ class RecipeSubscribeSerializer(serializers.ModelSerializer):
     Сериализатор для отображения рецепта из подписок,
     избранного, списка покупок
     """
+    image_srcset = ImageVariantsField(
+        'image', 'image_variants', ('card',)
+    )
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'image',
+            'id', 'name', 'image', 'image_srcset',
             'cooking_time'
         )
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для массовых операций"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
+        allow_empty=False, max_length=MAX_BULK_IDS
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     """Сериализатор для избранного"""
     id = serializers.IntegerField(source='recipe.id')
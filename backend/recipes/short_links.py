@@ -0,0 +1,52 @@
+import string
+from functools import lru_cache
+
+from django.conf import settings
+from recipes.models import Recipe
+
+ALPHABET = string.digits + string.ascii_letters
+BASE = len(ALPHABET)
+LENGTH = 6
+MODULUS = BASE ** LENGTH
+KEY_INVERSE = pow(settings.SHORT_LINK_KEY, -1, MODULUS)
+ALPHABET_INDEX = {char: index for index, char in enumerate(ALPHABET)}
+
+
+def encode(recipe_id):
+    """
+    Короткая ссылка из id рецепта: id перемешивается умножением
+    на SHORT_LINK_KEY по модулю 62^6 и записывается в base62,
+    поэтому соседние рецепты получают непохожие ссылки
+    """
+    if not 0 < recipe_id < MODULUS:
+        raise ValueError(f'id {recipe_id} не помещается в короткую ссылку')
+    number = recipe_id * settings.SHORT_LINK_KEY % MODULUS
+    chars = []
+    for _ in range(LENGTH):
+        number, index = divmod(number, BASE)
+        chars.append(ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+def decode(code):
+    """Обратное преобразование без обращения к базе данных"""
+    if len(code) != LENGTH:
+        return None
+    number = 0
+    for char in code:
+        if char not in ALPHABET_INDEX:
+            return None
+        number = number * BASE + ALPHABET_INDEX[char]
+    return number * KEY_INVERSE % MODULUS or None
+
+
+@lru_cache(maxsize=settings.SHORT_LINK_LEGACY_CACHE_SIZE)
+def resolve_legacy(code):
+    """id рецепта по ссылке, сохраненной в поле short_link до перехода"""
+    return Recipe.objects.filter(short_link=code).values_list(
+        'id', flat=True
+    ).first()
+
+
+def resolve(code):
+    return decode(code) or resolve_legacy(code)
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from jobs.queue import enqueue
+from recipes.catalogs import bump_catalog_version
+from recipes.counters import change_counters, origin_model, track_counter
+from recipes.feed import (backfill_subscription, fan_out_recipe,
+                          prune_subscription)
+from recipes.images import schedule_variants
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.response_cache import GLOBAL, LIST, bump_versions
+from users.models import Subscribe, User
+
+# Поля пользователя, которые попадают в ответы рецептов (AuthorSerializer)
+AUTHOR_FIELDS = {
+    'email', 'username', 'first_name', 'last_name', 'avatar',
+    'avatar_variants',
+}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    """
+    Сбрасывает индекс автодополнения и версию каталога
+    при изменении ингредиентов
+    """
+    ingredient_index.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    """Меняет версию каталога тегов для ETag"""
+    bump_catalog_version('tags')
+
+
+track_counter(
+    Favorite, 'recipe', Recipe, 'favorites_count', released_by=(User,)
+)
+track_counter(
+    ShoppingCart, 'recipe', Recipe, 'in_carts_count', released_by=(User,)
+)
+track_counter(Recipe, 'author', User, 'recipes_count')
+
+
+@receiver(pre_delete, sender=User)
+def release_recipe_counters(sender, instance, **kwargs):
+    """
+    Удаление пользователя уменьшает счетчики чужих рецептов
+    в его избранном и списке покупок: по запросу на пачку
+    вместо UPDATE на каждую удаляемую строку
+    """
+    for model in (Favorite, ShoppingCart):
+        change_counters(model, model.objects.filter(user=instance).exclude(
+            recipe__author=instance
+        ).only('recipe_id'), -1)
+
+
+@receiver(post_save, sender=Recipe)
+def add_recipe_to_feeds(sender, instance, created, **kwargs):
+    if created:
+        enqueue(fan_out_recipe, instance.id, instance.author_id)
+
+
+@receiver(post_save, sender=Recipe)
+def generate_recipe_image_variants(sender, instance, **kwargs):
+    schedule_variants(
+        instance, 'image', 'image_variants', settings.RECIPE_IMAGE_SIZES
+    )
+
+
+@receiver(post_save, sender=Subscribe)
+def add_author_to_feed(sender, instance, created, **kwargs):
+    if created:
+        enqueue(
+            backfill_subscription, instance.user_id, instance.following_id
+        )
+
+
+@receiver(post_delete, sender=Subscribe)
+def remove_author_from_feed(sender, instance, origin=None, **kwargs):
+    # При удалении пользователя его записи ленты удаляются каскадом
+    if origin is not None and origin_model(origin) is User:
+        return
+    prune_subscription(instance)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def bump_recipe_version(sender, instance, **kwargs):
+    """
+    Теги и ингредиенты меняются только вместе с сохранением рецепта,
+    поэтому версия меняется один раз на рецепт, а не на каждую связь
+    """
+    bump_versions(LIST, instance.id)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_global_version(sender, **kwargs):
+    """Изменение справочников сбрасывает весь кэш рецептов"""
+    bump_versions(GLOBAL)
+
+
+@receiver(post_save, sender=User)
+def bump_author_version(sender, instance, created, update_fields=None,
+                        **kwargs):
+    """
+    Кэш рецептов сбрасывается, только если сохранен автор рецептов
+    и могли измениться поля, которые выводит AuthorSerializer.
+    Удаление автора удаляет его рецепты, и их версии меняются сами
+    """
+    if created:
+        return
+    if update_fields is not None and not AUTHOR_FIELDS & set(update_fields):
+        return
+    if Recipe.objects.filter(author_id=instance.pk).exists():
+        bump_versions(GLOBAL)
@@ -1,6 +1,8 @@
 from django.urls import include, path
-from recipes.views import (FavoriteViewSet, IngredientViewSet, RecipeViewSet,
-                           ShoppingCartViewSet, TagViewSet)
+from recipes.views import (FavoriteBulkView, FavoriteViewSet,
+                           IngredientViewSet, RecipeViewSet,
+                           ShoppingCartBulkView, ShoppingCartViewSet,
+                           TagViewSet)
 from rest_framework import routers
 
 router_vers1 = routers.DefaultRouter()
@@ -20,6 +22,14 @@ urlpatterns = [
     path('recipes/download_shopping_cart/', ShoppingCartViewSet.as_view(
         {'get': 'download_shopping_cart'}
     ), name='download_shoppping_cart'),
+    path(
+        'recipes/favorite/bulk/', FavoriteBulkView.as_view(),
+        name='favorite_bulk'
+    ),
+    path(
+        'recipes/shopping_cart/bulk/', ShoppingCartBulkView.as_view(),
+        name='shopping_cart_bulk'
+    ),
     path(
         'recipes/<int:id>/favorite/', FavoriteViewSet.as_view(),
         name='favorite'
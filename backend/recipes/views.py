@@ -1,37 +1,67 @@
-import shortuuid
-from django.http import HttpResponse
+import csv
+import json
+
+from django.conf import settings
+from django.db.models import Sum
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
 from recipes.filters import IngredientFilter, RecipeFilter, RecipeFilterBackend
+from recipes.ingredient_index import ingredient_index
+from recipes.links import (add_link, bulk_add_links, bulk_remove_links,
+                           remove_link)
+from recipes.mixins import CatalogCacheMixin, RecipeResponseCacheMixin
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag)
+from recipes.pagination import FeedPagination, RecipePagination
 from recipes.permissions import IsAuthorOrAdmin
 from recipes.serializers import (FavoriteSerializer, IngredientSerializer,
-                                 RecipeCreateSerizalizer, RecipeReadSerializer,
-                                 ShoppingCartSerializer, TagSerializer)
+                                 RecipeCreateSerizalizer, RecipeIdsSerializer,
+                                 RecipeReadSerializer, ShoppingCartSerializer,
+                                 TagSerializer)
+from recipes.short_links import encode, resolve
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ViewSet
 
+SHOPPING_CART_FORMATS = ('txt', 'csv', 'json')
+
+
+class IgnoreFormatContentNegotiation(DefaultContentNegotiation):
+    """
+    Согласование формата ответа без учета параметра ?format=,
+    который используется для выбора формата файла со списком покупок
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(RecipeResponseCacheMixin, viewsets.ModelViewSet):
     """Класс, описывающий запросы к модели Recipe """
     serializer_class = RecipeReadSerializer
     filter_backends = (DjangoFilterBackend, RecipeFilterBackend)
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
 
     def get_queryset(self):
-        queryset = Recipe.objects.all()
-        return queryset.distinct()
+        queryset = Recipe.objects.with_user_flags(self.request.user)
+        if self.action in ('list', 'retrieve', 'feed'):
+            queryset = queryset.with_related().order_by('name', 'id')
+        return queryset
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             self.permission_classes = [IsAuthenticated, IsAuthorOrAdmin]
+        elif self.action == 'feed':
+            self.permission_classes = [IsAuthenticated]
         else:
             self.permission_classes = [IsAuthenticatedOrReadOnly]
         return super().get_permissions()
@@ -41,12 +71,18 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeReadSerializer
         return RecipeCreateSerizalizer
 
+    def get_read_instance(self, recipe):
+        """Перечитывает рецепт для ответа фиксированным числом запросов"""
+        return Recipe.objects.with_user_flags(
+            self.request.user
+        ).with_related().get(pk=recipe.pk)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             self.perform_create(serializer)
             read_serializer = RecipeReadSerializer(
-                instance=serializer.instance,
+                instance=self.get_read_instance(serializer.instance),
                 context={'request': request}
             )
             return Response(
@@ -68,35 +104,48 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             self.perform_update(serializer)
             read_serializer = RecipeReadSerializer(
-                instance=serializer.instance,
+                instance=self.get_read_instance(serializer.instance),
                 context={'request': request}
             )
             return Response(read_serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'])
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь"""
+        paginator = FeedPagination()
+        recipes = paginator.paginate_queryset(
+            self.get_queryset(), request, view=self
+        )
+        serializer = RecipeReadSerializer(
+            recipes, many=True, context={'request': request}
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_short_link(self, request, pk=None):
-        recipe = self.get_object()
-        if not recipe.short_link:
-            recipe.short_link = shortuuid.uuid()
-            recipe.save()
-
-        short_link_url = f"foodgram-yp.zapto.org/s/{recipe.short_link}"
+        """Ссылка вычисляется из id рецепта и не сохраняется в базе"""
+        recipe = get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        short_link_url = settings.SHORT_LINK_HOST + reverse(
+            'short_link_decode', args=(encode(recipe.id),)
+        )
         return Response(
             {'short-link': short_link_url}, status=status.HTTP_200_OK
         )
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     """Класс, описывающий запросы к модели Tag """
+    catalog = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
     http_method_names = ["get", ]
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     """Класс, описывающий запросы к модели Ingredient """
+    catalog = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
@@ -105,24 +154,40 @@ class IngredientViewSet(viewsets.ModelViewSet):
     pagination_class = None
     http_method_names = ["get", ]
 
+    def list(self, request, *args, **kwargs):
+        """Автодополнение по префиксу отвечает из индекса в памяти"""
+        prefix = (
+            request.query_params.get('name')
+            or request.query_params.get('search', '')
+        ).strip()
+        if not prefix:
+            return super().list(request, *args, **kwargs)
+        ingredients = ingredient_index.search(
+            prefix, settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+        )
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+
 
 class FavoriteViewSet(APIView):
     """Класс, описывающий запросы к модели избранного """
     permission_classes = [IsAuthenticated]
+    serializer_class = FavoriteSerializer
+    added_message = 'Вы уже добавили этот рецепт в избранное'
+    missing_message = 'Этого рецепта нет в избранном'
 
     def post(self, request, id):
         user = request.user
         recipe = get_object_or_404(Recipe, id=id)
 
-        if Favorite.objects.filter(user=user, recipe=recipe).exists():
+        favorite = add_link(Favorite, user=user, recipe=recipe)
+        if favorite is None:
             return Response(
-                {"detail": "Вы уже добавили этот рецепт в избранное"},
+                {"detail": self.added_message},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        favorite = Favorite.objects.create(user=user, recipe=recipe)
-
-        serialized_favorited = FavoriteSerializer(
+        serialized_favorited = self.serializer_class(
             favorite, context={'request': request}
         )
         return Response(
@@ -133,20 +198,22 @@ class FavoriteViewSet(APIView):
     def delete(self, request, *args, **kwargs):
         user = request.user
         recipe_id = kwargs.get('id')
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        if not Favorite.objects.filter(user=user, recipe=recipe).exists():
+        if not remove_link(Favorite, user=user, recipe_id=recipe_id):
+            get_object_or_404(Recipe.objects.only('id'), id=recipe_id)
             return Response(
-                {"detail": "Этого рецепта нет в избранном"},
+                {"detail": self.missing_message},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        favorite = get_object_or_404(Favorite, user=user, recipe=recipe)
-        favorite.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class ShoppingCartViewSet(ViewSet):
     """Класс, описывающий запросы к модели списка покупок """
     permission_classes = [IsAuthenticated]
+    content_negotiation_class = IgnoreFormatContentNegotiation
+    serializer_class = ShoppingCartSerializer
+    added_message = 'Вы уже добавили этот рецепт в список покупок'
+    missing_message = 'Этого рецепта нет в списке покупок'
 
     @action(detail=True, methods=['post'])
     def post(self, request, id):
@@ -154,15 +221,14 @@ class ShoppingCartViewSet(ViewSet):
         user = request.user
         recipe = get_object_or_404(Recipe, id=id)
 
-        if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
+        shopping_cart = add_link(ShoppingCart, user=user, recipe=recipe)
+        if shopping_cart is None:
             return Response(
-                {"detail": "Вы уже добавили этот рецепт в список покупок"},
+                {"detail": self.added_message},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        shopping_cart = ShoppingCart.objects.create(user=user, recipe=recipe)
-
-        serialized_shopping_cart = ShoppingCartSerializer(
+        serialized_shopping_cart = self.serializer_class(
             shopping_cart, context={'request': request}
         )
         return Response(
@@ -175,66 +241,146 @@ class ShoppingCartViewSet(ViewSet):
         """Удаление из списка покупок"""
         user = request.user
         recipe_id = kwargs.get('id')
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        if not ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
+        if not remove_link(ShoppingCart, user=user, recipe_id=recipe_id):
+            get_object_or_404(Recipe.objects.only('id'), id=recipe_id)
             return Response(
-                {"detail": "Этого рецепта нет в списке покупок"},
+                {"detail": self.missing_message},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        shopping_cart = get_object_or_404(
-            ShoppingCart, user=user, recipe=recipe
-        )
-        shopping_cart.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['get'])
     def download_shopping_cart(self, request):
-        """Получение файла со списком покупок"""
+        """Получение файла со списком покупок в формате txt, csv или json"""
         user = request.user
-        return download_shopping_cart(user)
+        file_format = request.query_params.get(
+            'format', SHOPPING_CART_FORMATS[0]
+        ).lower()
+        if file_format not in SHOPPING_CART_FORMATS:
+            return Response(
+                {"detail": "Доступные форматы: txt, csv, json"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return download_shopping_cart(user, file_format)
+
+
+class RecipeLinksBulkView(APIView):
+    """
+    Массовое добавление (POST) и удаление (DELETE) рецептов
+    в избранном или списке покупок. Тело запроса: {"ids": [1, 2, 3]},
+    в ответе статус для каждого id
+    """
+    permission_classes = [IsAuthenticated]
+    model = None
+
+    def get_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['ids']
+
+    def post(self, request):
+        results = bulk_add_links(
+            self.model, request.user, self.get_ids(request)
+        )
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        results = bulk_remove_links(
+            self.model, request.user, self.get_ids(request)
+        )
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class FavoriteBulkView(RecipeLinksBulkView):
+    model = Favorite
+
+
+class ShoppingCartBulkView(RecipeLinksBulkView):
+    model = ShoppingCart
 
 
 class DecodeView(View):
-    """Функция открывает рецепт по переданной короткой ссылке"""
+    """
+    Открывает рецепт по переданной короткой ссылке.
+    Ведет на страницу рецепта во фронтенде.
+    Новые ссылки декодируются без запроса к базе, старые ищутся
+    по полю short_link через LRU-кэш процесса. Редирект можно
+    кэшировать на nginx
+    """
     def get(self, request, short_link, *args, **kwargs):
-        recipe = get_object_or_404(Recipe, short_link=short_link)
-        return redirect('recipe-detail', pk=recipe.pk)
-
-
-def download_shopping_cart(user):
-    """Создание файла со списком покупок"""
-    shopping_lists = ShoppingCart.objects.filter(user=user)
-    ingredients = {}
-
-    for shopping_list in shopping_lists:
-        recipe = shopping_list.recipe
-        for ingredient_recipe in IngredientRecipe.objects.filter(
-            recipe=recipe
-        ):
-            ingredient_name = ingredient_recipe.ingredient.name
-            ingredient_unit = ingredient_recipe.ingredient.measurement_unit
-            ingredient_amount = ingredient_recipe.amount
-            if ingredient_name in ingredients:
-                ingredients[ingredient_name]['amount'] += ingredient_amount
-            else:
-                ingredients[ingredient_name] = {
-                    'amount': ingredient_amount,
-                    'measurement_unit': ingredient_unit
-                }
-
-    file_content = generate_txt(ingredients)
-    response = HttpResponse(file_content, content_type='text/plain')
+        recipe_id = resolve(short_link)
+        if recipe_id is None:
+            raise Http404('Рецепт не найден')
+        response = redirect(f'/recipes/{recipe_id}')
+        patch_cache_control(
+            response, public=True, max_age=settings.SHORT_LINK_MAX_AGE
+        )
+        return response
+
+
+def download_shopping_cart(user, file_format=SHOPPING_CART_FORMATS[0]):
+    """
+    Создание файла со списком покупок.
+    Суммы по ингредиентам считаются одним запросом в базе данных,
+    а файл отдается клиенту построчно.
+    """
+    ingredients = IngredientRecipe.objects.filter(
+        recipe__in_shopping_cart__user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('ingredient__name')
+
+    generators = {
+        'txt': (generate_txt, 'text/plain; charset=utf-8'),
+        'csv': (generate_csv, 'text/csv; charset=utf-8'),
+        'json': (generate_json, 'application/json'),
+    }
+    generator, content_type = generators[file_format]
+    response = StreamingHttpResponse(
+        generator(ingredients.iterator()), content_type=content_type
+    )
     response['Content-Disposition'] = (
-        'attachment; filename="shopping_cart.txt"'
+        f'attachment; filename="shopping_cart.{file_format}"'
     )
     return response
 
 
+class Echo:
+    """Буфер-заглушка, возвращающий записанную строку для csv.writer"""
+    def write(self, value):
+        return value
+
+
 def generate_txt(ingredients):
-    lines = []
-    for ingredient, details in ingredients.items():
-        lines.append(
-            f"{ingredient}: {details['amount']} "
-            f"{details['measurement_unit']}"
+    for ingredient in ingredients:
+        yield (
+            f"{ingredient['ingredient__name']}: "
+            f"{ingredient['total_amount']} "
+            f"{ingredient['ingredient__measurement_unit']}\n"
         )
-    return "\n".join(lines)
+
+
+def generate_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Количество', 'Единица измерения'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['total_amount'],
+            ingredient['ingredient__measurement_unit'],
+        ))
+
+
+def generate_json(ingredients):
+    yield '['
+    separator = ''
+    for ingredient in ingredients:
+        yield separator + json.dumps({
+            'name': ingredient['ingredient__name'],
+            'amount': ingredient['total_amount'],
+            'measurement_unit': ingredient['ingredient__measurement_unit'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield ']'
@@ -0,0 +1,8 @@
+from backend_foodgram.urls import urlpatterns as sync_urlpatterns
+from django.urls import include, path
+
+# Маршруты как при ASYNC_VIEWS=True
+urlpatterns = [
+    path('', include('recipes.async_urls')),
+    *sync_urlpatterns,
+]
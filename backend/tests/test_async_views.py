@@ -0,0 +1,119 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, RequestFactory, TestCase
+from recipes.async_views import aauthenticate
+from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                            ShoppingCart, Tag, TagRecipe)
+from recipes.views import FavoriteViewSet, ShoppingCartViewSet
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+ASYNC_URLCONF = 'tests.async_urls'
+
+
+class AsyncViewsTests(TestCase):
+    """Асинхронные представления отвечают так же, как синхронные"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.reader = create_user('reader')
+        cls.token = Token.objects.create(user=cls.reader)
+        tag = Tag.objects.create(name='Обед', slug='lunch')
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        cls.recipes = [
+            create_recipe(cls.author, name=f'Рецепт {number}')
+            for number in range(3)
+        ]
+        for recipe in cls.recipes:
+            TagRecipe.objects.create(recipe=recipe, tag=tag)
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=salt, amount=5
+            )
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipes[1])
+
+    def setUp(self):
+        cache.clear()
+
+    def headers(self, authenticated):
+        if not authenticated:
+            return {}
+        return {'Authorization': f'Token {self.token}'}
+
+    def sync_request(self, method, url, authenticated=True, **params):
+        client = APIClient()
+        client.credentials(
+            **{f'HTTP_{key.upper()}': value
+               for key, value in self.headers(authenticated).items()}
+        )
+        return getattr(client, method)(url, params)
+
+    def async_request(self, method, url, authenticated=True, **params):
+        async def fetch():
+            return await getattr(AsyncClient(), method)(
+                url, params, headers=self.headers(authenticated)
+            )
+
+        with self.settings(ROOT_URLCONF=ASYNC_URLCONF):
+            return async_to_sync(fetch)()
+
+    def assertSameResponse(self, method, url, authenticated=True, **params):
+        sync_response = self.sync_request(method, url, authenticated, **params)
+        async_response = self.async_request(
+            method, url, authenticated, **params
+        )
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+        return async_response
+
+    def test_recipe_list(self):
+        response = self.assertSameResponse(
+            'get', '/api/recipes/', limit=2, offset=1
+        )
+        self.assertEqual(response.json()['count'], 3)
+        self.assertSameResponse('get', '/api/recipes/', authenticated=False)
+        self.assertSameResponse('get', '/api/recipes/', is_favorited=1)
+
+    def test_recipe_detail(self):
+        url = f'/api/recipes/{self.recipes[0].id}/'
+        response = self.assertSameResponse('get', url)
+        self.assertTrue(response.json()['is_favorited'])
+        self.assertSameResponse('get', url, authenticated=False)
+        self.assertSameResponse('get', '/api/recipes/0/')
+
+    def test_recipe_toggle(self):
+        for path, view_class in (
+            ('favorite', FavoriteViewSet),
+            ('shopping_cart', ShoppingCartViewSet),
+        ):
+            with self.subTest(path=path):
+                url = f'/api/recipes/{self.recipes[2].id}/{path}/'
+                sync_response = self.sync_request('post', url)
+                self.sync_request('delete', url)
+                response = self.async_request('post', url)
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(response.json(), sync_response.json())
+
+                response = self.assertSameResponse('post', url)
+                self.assertEqual(
+                    response.json(), {'detail': view_class.added_message}
+                )
+                self.assertEqual(
+                    self.async_request('delete', url).status_code, 204
+                )
+                response = self.assertSameResponse('delete', url)
+                self.assertEqual(
+                    response.json(), {'detail': view_class.missing_message}
+                )
+                self.assertSameResponse('post', f'/api/recipes/0/{path}/')
+
+    def test_authenticate_sets_request_user(self):
+        request = RequestFactory().post(
+            '/api/recipes/1/favorite/',
+            HTTP_AUTHORIZATION=f'Token {self.token}'
+        )
+        user = async_to_sync(aauthenticate)(request)
+        self.assertEqual(user, self.reader)
+        self.assertEqual(request.user, self.reader)
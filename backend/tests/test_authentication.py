@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from tests.utils import create_user
+from users.models import User
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Кэш токенов используется только для чтения"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def token_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            getattr(self.client, method)(url, **kwargs)
+        return [
+            query for query in context.captured_queries
+            if 'authtoken_token' in query['sql']
+        ]
+
+    def test_safe_requests_use_cache(self):
+        self.assertEqual(len(self.token_queries('get', '/api/users/me/')), 1)
+        self.assertEqual(len(self.token_queries('get', '/api/users/me/')), 0)
+
+    def test_write_requests_read_user_from_database(self):
+        self.token_queries('get', '/api/users/me/')
+        User.objects.filter(pk=self.user.pk).update(first_name='Имя')
+        self.assertEqual(len(self.token_queries(
+            'put', '/api/users/me/avatar/', data={}, format='json'
+        )), 1)
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['first_name'], 'Имя')
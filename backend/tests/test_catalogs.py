@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.test import TestCase
+from recipes.catalogs import get_catalog_version
+from recipes.models import Tag
+from rest_framework.test import APIClient
+
+
+class CatalogVersionTests(TestCase):
+    """Версия справочника меняется только после коммита"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_after_commit(self):
+        version = get_catalog_version('tags')
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Обед', slug='lunch')
+            self.assertEqual(get_catalog_version('tags'), version)
+        self.assertNotEqual(get_catalog_version('tags'), version)
+
+    def test_rollback_keeps_version(self):
+        version = get_catalog_version('tags')
+        with self.captureOnCommitCallbacks(execute=False):
+            Tag.objects.create(name='Обед', slug='lunch')
+        self.assertEqual(get_catalog_version('tags'), version)
+
+    def test_etag(self):
+        client = APIClient()
+        etag = client.get('/api/tags/')['ETag']
+        response = client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Обед', slug='lunch')
+        response = client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
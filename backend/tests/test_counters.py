@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Favorite
+from tests.utils import create_recipe, create_user
+from users.models import Subscribe, User
+
+
+class CounterFieldsTests(TestCase):
+    """Сохранение устаревшей копии не затирает счетчики"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.reader = create_user('reader')
+
+    def test_recipe_save_keeps_counters(self):
+        recipe = create_recipe(self.author)
+        Favorite.objects.create(user=self.reader, recipe=recipe)
+        recipe.name = 'Новое название'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_user_save_keeps_counters(self):
+        author = User.objects.get(pk=self.author.pk)
+        Subscribe.objects.create(user=self.reader, following=self.author)
+        create_recipe(self.author)
+        author.first_name = 'Имя'
+        author.save()
+        author.refresh_from_db()
+        self.assertEqual(author.first_name, 'Имя')
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.recipes_count, 1)
+
+    def test_deferred_fields_are_not_saved(self):
+        author = User.objects.only('first_name').get(pk=self.author.pk)
+        author.first_name = 'Имя'
+        author.save()
+        author.refresh_from_db()
+        self.assertEqual(author.email, 'author@example.com')
+
+
+class CascadeCountersTests(TestCase):
+    """Каскадное удаление не обновляет счетчики удаляемых строк"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.readers = [create_user(f'reader{number}') for number in range(3)]
+        cls.recipe = create_recipe(cls.author)
+        cls.other = create_recipe(cls.readers[0], 'Чужой рецепт')
+        for reader in cls.readers:
+            Favorite.objects.create(user=reader, recipe=cls.recipe)
+            Subscribe.objects.create(user=reader, following=cls.author)
+        Favorite.objects.create(user=cls.author, recipe=cls.other)
+        Subscribe.objects.create(user=cls.author, following=cls.readers[0])
+
+    def counter_updates(self, delete):
+        with CaptureQueriesContext(connection) as context:
+            delete()
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+
+    def test_recipe_delete(self):
+        updates = self.counter_updates(self.recipe.delete)
+        # Только recipes_count автора, без UPDATE на каждое избранное
+        self.assertEqual(len(updates), 1)
+        self.assertIn('recipes_count', updates[0])
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 0)
+
+    def test_user_delete(self):
+        updates = self.counter_updates(self.author.delete)
+        # Одно UPDATE на избранное, одно на подписки
+        self.assertEqual(len(updates), 2)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.favorites_count, 0)
+        reader = User.objects.get(pk=self.readers[0].pk)
+        self.assertEqual(reader.followers_count, 0)
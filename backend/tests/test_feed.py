@@ -0,0 +1,35 @@
+from django.test import TestCase, override_settings
+from recipes.feed import rebuild_feed
+from recipes.models import FeedEntry
+from tests.utils import create_recipe, create_user
+from users.models import Subscribe
+
+
+class RebuildFeedTests(TestCase):
+    """Лента заполняется одним запросом по всем подпискам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            create_user(f'user{number}')
+            for number in range(3)
+        ]
+        reader, author, popular = cls.users
+        Subscribe.objects.create(user=reader, following=author)
+        Subscribe.objects.create(user=reader, following=popular)
+        Subscribe.objects.create(user=author, following=popular)
+        for user in (author, popular):
+            for number in range(2):
+                create_recipe(user, f'Рецепт {number}')
+        FeedEntry.objects.all().delete()
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_rebuild_skips_popular_authors(self):
+        reader, author, _popular = self.users
+        with self.assertNumQueries(1):
+            self.assertEqual(rebuild_feed(), 2)
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('user_id', 'author_id')),
+            {(reader.id, author.id)}
+        )
+        self.assertEqual(rebuild_feed(), 0)
@@ -0,0 +1,68 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.catalogs import get_catalog_version
+from recipes.management.utils import RECIPES_FILE
+from recipes.models import Ingredient, Recipe, Tag
+
+RECORDS = [
+    {
+        'type': 'author', 'email': 'author@example.com',
+        'username': 'author', 'first_name': 'Имя', 'last_name': 'Фамилия',
+        'avatar': None,
+    },
+    {'type': 'tag', 'name': 'Завтрак', 'slug': 'breakfast'},
+    {
+        'type': 'recipe', 'author': 'author@example.com', 'name': 'Каша',
+        'text': 'Описание', 'cooking_time': 10, 'image': None,
+        'tags': ['breakfast'],
+        'ingredients': [
+            {'name': 'Овсянка', 'measurement_unit': 'г', 'amount': 100}
+        ],
+    },
+]
+
+
+class ImportRecipesTests(TestCase):
+    """Новые теги и ингредиенты сбрасывают кэши справочников"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.input = Path(directory.name)
+        with (self.input / RECIPES_FILE).open('w', encoding='utf8') as file:
+            for record in RECORDS:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def import_recipes(self):
+        # Версии меняются после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                'import_recipes', str(self.input), '--no-media',
+                stdout=StringIO(), stderr=StringIO()
+            )
+
+    def test_new_catalog_rows_bump_versions(self):
+        tags = get_catalog_version('tags')
+        ingredients = get_catalog_version('ingredients')
+        self.import_recipes()
+        self.assertTrue(Tag.objects.filter(slug='breakfast').exists())
+        self.assertTrue(Ingredient.objects.filter(name='Овсянка').exists())
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertNotEqual(get_catalog_version('tags'), tags)
+        self.assertNotEqual(get_catalog_version('ingredients'), ingredients)
+
+    def test_repeated_import_keeps_versions(self):
+        self.import_recipes()
+        tags = get_catalog_version('tags')
+        ingredients = get_catalog_version('ingredients')
+        self.import_recipes()
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(get_catalog_version('tags'), tags)
+        self.assertEqual(get_catalog_version('ingredients'), ingredients)
@@ -0,0 +1,121 @@
+import csv
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Ingredient, Tag
+
+INGREDIENTS = [
+    {'name': 'соль', 'measurement_unit': 'г'},
+    {'name': 'соус "Чили", острый', 'measurement_unit': 'мл'},
+    {'name': 'яйца', 'measurement_unit': 'шт.'},
+]
+TAGS = [
+    {'name': 'Завтрак', 'slug': 'breakfast'},
+    {'name': 'Обед, горячее', 'slug': 'lunch'},
+]
+
+
+class ImportCatalogTests(TestCase):
+    """Выгрузка справочника в файл и загрузка обратно через importcsv"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def export(self, rows, columns, suffix, name='catalog'):
+        """Записывает строки в файл в формате importcsv"""
+        path = self.directory / f'{name}{suffix}'
+        with path.open('w', encoding='utf8', newline='') as file:
+            if suffix == '.csv':
+                csv.writer(file).writerows(
+                    [row[column] for column in columns] for row in rows
+                )
+            elif suffix == '.json':
+                json.dump(rows, file, ensure_ascii=False)
+            else:
+                for row in rows:
+                    file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return path
+
+    def import_catalog(self, path, *args):
+        stdout = StringIO()
+        call_command(
+            'importcsv', *args, '--file', str(path), stdout=stdout
+        )
+        return stdout.getvalue()
+
+    def ingredients(self):
+        return list(Ingredient.objects.order_by('name').values(
+            'name', 'measurement_unit'
+        ))
+
+    def test_ingredients_round_trip(self):
+        for suffix in ('.csv', '.json', '.ndjson'):
+            for copy in ((), ('--no-copy',)):
+                with self.subTest(suffix=suffix, copy=copy):
+                    Ingredient.objects.all().delete()
+                    path = self.export(
+                        INGREDIENTS, ('name', 'measurement_unit'), suffix
+                    )
+                    output = self.import_catalog(
+                        path, '--batch-size=2', *copy
+                    )
+                    self.assertIn('Добавлено: 3, обновлено: 0', output)
+                    self.assertEqual(self.ingredients(), INGREDIENTS)
+
+                    # Выгрузка импортированного справочника дает тот же файл
+                    exported = self.export(
+                        self.ingredients(), ('name', 'measurement_unit'),
+                        suffix, name='exported'
+                    )
+                    self.assertEqual(
+                        exported.read_text(encoding='utf8'),
+                        path.read_text(encoding='utf8')
+                    )
+                    output = self.import_catalog(exported, *copy)
+                    self.assertIn(
+                        'Добавлено: 0, обновлено: 0, без изменений: 3',
+                        output
+                    )
+
+    def test_tags_round_trip(self):
+        path = self.export(TAGS, ('name', 'slug'), '.csv')
+        self.import_catalog(path, 'tags')
+        self.assertEqual(
+            list(Tag.objects.order_by('slug').values('name', 'slug')), TAGS
+        )
+
+    def test_upsert_updates_changed_rows(self):
+        Ingredient.objects.create(name='соль', measurement_unit='кг')
+        path = self.export(INGREDIENTS, ('name', 'measurement_unit'), '.json')
+        output = self.import_catalog(path)
+        self.assertIn('Добавлено: 2, обновлено: 1, без изменений: 0', output)
+        self.assertEqual(
+            Ingredient.objects.get(name='соль').measurement_unit, 'г'
+        )
+
+    def test_dry_run_writes_nothing(self):
+        path = self.export(INGREDIENTS, ('name', 'measurement_unit'), '.csv')
+        output = self.import_catalog(path, '--dry-run')
+        self.assertIn('+ соль', output)
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_incomplete_and_repeated_rows(self):
+        path = self.export([
+            {'name': 'соль', 'measurement_unit': 'кг'},
+            {'name': 'перец', 'measurement_unit': ''},
+            {'name': 'соль', 'measurement_unit': 'г'},
+        ], ('name', 'measurement_unit'), '.ndjson')
+        output = self.import_catalog(path)
+        self.assertIn('Добавлено: 1, обновлено: 0', output)
+        self.assertIn('пропущено: 1', output)
+        self.assertEqual(
+            self.ingredients(), [{'name': 'соль', 'measurement_unit': 'г'}]
+        )
@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from recipes.catalogs import bump_catalog_version
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+from rest_framework.test import APIClient
+
+URL = '/api/ingredients/'
+
+
+class IngredientAutocompleteTests(TestCase):
+    """Автодополнение ингредиентов из индекса и фильтр без префикса"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in (
+                'Соль морская', 'соль', 'Сода', 'Солод ячменный', 'Сахар',
+                'Капуста'
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Индекс общий для процесса: каждый тест строит его заново
+        ingredient_index.invalidate()
+        self.client = APIClient()
+
+    def names(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.json()]
+
+    def test_without_prefix_lists_catalog(self):
+        self.assertEqual(
+            sorted(self.names()),
+            sorted(Ingredient.objects.values_list('name', flat=True))
+        )
+
+    def test_prefix_ranking(self):
+        # Сначала точное совпадение, затем более короткие названия
+        self.assertEqual(
+            self.names(name='СОЛ'),
+            ['соль', 'Соль морская', 'Солод ячменный']
+        )
+        self.assertEqual(self.names(name='соль'), ['соль', 'Соль морская'])
+        self.assertEqual(self.names(search='са'), ['Сахар'])
+        self.assertEqual(self.names(name='Мука'), [])
+
+    @override_settings(INGREDIENT_AUTOCOMPLETE_LIMIT=2)
+    def test_limit(self):
+        self.assertEqual(self.names(name='со'), ['Сода', 'соль'])
+
+    def test_matches_filter_path(self):
+        response = self.client.get(URL, {'name': 'со'})
+        ingredients = Ingredient.objects.filter(name__istartswith='со')
+        self.assertEqual(
+            sorted(item['id'] for item in response.json()),
+            sorted(ingredients.values_list('id', flat=True))
+        )
+        self.assertEqual(
+            set(response.json()[0]), {'id', 'name', 'measurement_unit'}
+        )
+
+    def test_built_index_skips_database(self):
+        self.names(name='со')
+        with self.assertNumQueries(0):
+            self.names(name='са')
+
+    def test_model_changes_invalidate(self):
+        self.assertEqual(self.names(name='сал'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            salad = Ingredient.objects.create(
+                name='Салат', measurement_unit='г'
+            )
+        self.assertEqual(self.names(name='сал'), ['Салат'])
+        with self.captureOnCommitCallbacks(execute=True):
+            salad.delete()
+        self.assertEqual(self.names(name='сал'), [])
+
+    def test_version_bump_from_other_process(self):
+        self.names(name='со')
+        # bulk_create не шлет сигналы, как и импорт в другом процессе
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='Соус', measurement_unit='мл')]
+        )
+        self.assertNotIn('Соус', self.names(name='со'))
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_catalog_version('ingredients')
+        self.assertIn('Соус', self.names(name='со'))
@@ -0,0 +1,64 @@
+from django.test import TestCase
+from recipes.links import (CREATED, DELETED, EXISTS, MISSING, NOT_FOUND,
+                           bulk_add_links, bulk_remove_links)
+from recipes.models import Favorite, Recipe
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+
+class BulkAddLinksTests(TestCase):
+    """Статусы и счетчики массового добавления"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.recipes = [
+            create_recipe(cls.user, f'Рецепт {number}')
+            for number in range(3)
+        ]
+
+    def test_statuses_follow_inserted_rows(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        Favorite.objects.create(user=self.user, recipe_id=first)
+        missing = third + 100
+        result = bulk_add_links(
+            Favorite, self.user, [first, second, missing, third]
+        )
+        self.assertEqual(
+            [item['status'] for item in result],
+            [EXISTS, CREATED, NOT_FOUND, CREATED]
+        )
+        self.assertEqual(
+            list(Recipe.objects.order_by('id').values_list(
+                'favorites_count', flat=True
+            )),
+            [1, 1, 1]
+        )
+        result = bulk_add_links(Favorite, self.user, [second, third])
+        self.assertEqual(
+            [item['status'] for item in result], [EXISTS, EXISTS]
+        )
+        self.assertEqual(
+            Recipe.objects.get(id=second).favorites_count, 1
+        )
+
+    def test_remove_statuses_follow_deleted_rows(self):
+        first, second, _third = (recipe.id for recipe in self.recipes)
+        Favorite.objects.create(user=self.user, recipe_id=first)
+        result = bulk_remove_links(
+            Favorite, self.user, [first, second, second + 100]
+        )
+        self.assertEqual(
+            [item['status'] for item in result],
+            [DELETED, MISSING, NOT_FOUND]
+        )
+        self.assertEqual(Recipe.objects.get(id=first).favorites_count, 0)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_too_large_id_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            '/api/recipes/favorite/bulk/', {'ids': [2 ** 63]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,25 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+
+class RecipePaginationTests(TestCase):
+    """Поиск не переходит в курсорный режим"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        for name in ('Борщ', 'Борщ зеленый', 'Щи'):
+            create_recipe(author, name)
+
+    def test_cursor_mode(self):
+        response = APIClient().get('/api/recipes/?pagination=cursor')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+
+    def test_search_falls_back_to_limit_offset(self):
+        response = APIClient().get(
+            '/api/recipes/?pagination=cursor&search=борщ'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('count', response.data)
@@ -0,0 +1,226 @@
+import shutil
+import tempfile
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from recipes.feed import rebuild_feed
+from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                            ShoppingCart, Tag, TagRecipe)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user, image_data
+from users.models import Subscribe
+
+# Управление транзакцией: в тестах каждый atomic() становится точкой
+# сохранения, а в работе это BEGIN/COMMIT, которые в счет не входят
+TRANSACTION_CONTROL = (
+    'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class CaptureAllQueries(ExitStack):
+    """Запросы ко всем базам, как их считает QueryCountMiddleware"""
+
+    def __enter__(self):
+        super().__enter__()
+        self.contexts = [
+            self.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in settings.DATABASES
+        ]
+        return self
+
+    @property
+    def queries(self):
+        return [
+            query['sql']
+            for context in self.contexts
+            for query in context.captured_queries
+            if not query['sql'].startswith(TRANSACTION_CONTROL)
+        ]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTests(TestCase):
+    """
+    Каждый бюджет из QUERY_BUDGETS проверяется запросом к эндпоинту
+    на данных, где N+1 дал бы заметно больше запросов
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.authors = [
+            create_user(f'author{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Subscribe.objects.create(user=cls.user, following=author)
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(40)
+        ]
+        cls.recipes = []
+        for number in range(15):
+            recipe = create_recipe(cls.authors[number % 3], f'Рецепт {number}')
+            TagRecipe.objects.bulk_create(
+                TagRecipe(recipe=recipe, tag=tag) for tag in cls.tags[:2]
+            )
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+                for ingredient in cls.ingredients[:5]
+            )
+            cls.recipes.append(recipe)
+        for recipe in cls.recipes[:5]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        rebuild_feed()
+        cls.token = Token.objects.create(user=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def endpoints(self):
+        """Эндпоинт -> (метод, адрес, тело запроса)"""
+        recipe_ids = [recipe.id for recipe in self.recipes]
+        new_recipe = {
+            'name': 'Новый рецепт', 'text': 'Описание', 'cooking_time': 5,
+            'image': image_data(), 'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in self.ingredients
+            ],
+        }
+        return {
+            'RecipeViewSet.list': ('get', '/api/recipes/?limit=15', None),
+            'RecipeViewSet.retrieve': (
+                'get', f'/api/recipes/{recipe_ids[0]}/', None
+            ),
+            'RecipeViewSet.feed': ('get', '/api/recipes/feed/', None),
+            'UserViewSet.retrieve': (
+                'get', f'/api/users/{self.authors[0].id}/', None
+            ),
+            'UserViewSet.get_me': ('get', '/api/users/me/', None),
+            'SubscribeViewSet.list': (
+                'get', '/api/users/subscriptions/?recipes_limit=2', None
+            ),
+            'ShoppingCartViewSet.download_shopping_cart': (
+                'get', '/api/recipes/download_shopping_cart/', None
+            ),
+            'FavoriteViewSet.post': (
+                'post', f'/api/recipes/{recipe_ids[14]}/favorite/', None
+            ),
+            'FavoriteViewSet.delete': (
+                'delete', f'/api/recipes/{recipe_ids[0]}/favorite/', None
+            ),
+            'ShoppingCartViewSet.post': (
+                'post', f'/api/recipes/{recipe_ids[14]}/shopping_cart/', None
+            ),
+            'ShoppingCartViewSet.delete': (
+                'delete', f'/api/recipes/{recipe_ids[0]}/shopping_cart/',
+                None
+            ),
+            'FavoriteBulkView.post': (
+                'post', '/api/recipes/favorite/bulk/',
+                {'ids': recipe_ids[5:14]}
+            ),
+            'FavoriteBulkView.delete': (
+                'delete', '/api/recipes/favorite/bulk/',
+                {'ids': recipe_ids[1:5]}
+            ),
+            'ShoppingCartBulkView.post': (
+                'post', '/api/recipes/shopping_cart/bulk/',
+                {'ids': recipe_ids[5:14]}
+            ),
+            'ShoppingCartBulkView.delete': (
+                'delete', '/api/recipes/shopping_cart/bulk/',
+                {'ids': recipe_ids[1:5]}
+            ),
+            'RecipeViewSet.create': ('post', '/api/recipes/', new_recipe),
+            'RecipeViewSet.partial_update': (
+                'patch', f'/api/recipes/{self.own_recipe().id}/',
+                new_recipe
+            ),
+        }
+
+    def own_recipe(self):
+        recipe = create_recipe(self.user, 'Свой рецепт')
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in self.ingredients
+        )
+        return recipe
+
+    def test_every_budget_has_a_check(self):
+        self.assertEqual(
+            set(self.endpoints()), set(settings.QUERY_BUDGETS)
+        )
+
+    def test_tracked_views_have_budgets(self):
+        budgeted = {
+            endpoint.split('.')[0] for endpoint in settings.QUERY_BUDGETS
+        }
+        self.assertEqual(set(settings.QUERY_COUNT_VIEWS), budgeted)
+
+    def test_query_budgets(self):
+        for endpoint, (method, url, data) in self.endpoints().items():
+            with self.subTest(endpoint=endpoint):
+                # Промах кэша токена и каталогов: худший случай
+                cache.clear()
+                with CaptureAllQueries() as captured:
+                    response = getattr(self.client, method)(
+                        url, data=data, format='json'
+                    )
+                    # Тело потокового ответа читается из базы по ходу
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 400, endpoint)
+                budget = settings.QUERY_BUDGETS[endpoint]
+                self.assertLessEqual(
+                    len(captured.queries), budget,
+                    '\n'.join([endpoint, *captured.queries])
+                )
+
+
+@override_settings(QUERY_COUNT_ENABLED=True, QUERY_COUNT_HEADERS=True)
+class QueryCountMiddlewareTests(TestCase):
+    """Запросы потокового тела попадают в лог QueryCountMiddleware"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        recipe = create_recipe(cls.user)
+        IngredientRecipe.objects.create(
+            recipe=recipe, amount=1, ingredient=Ingredient.objects.create(
+                name='Соль', measurement_unit='г'
+            )
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_streaming_body_is_counted(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertLogs('backend_foodgram.queries', 'INFO') as logs:
+            response = client.get('/api/recipes/download_shopping_cart/')
+            self.assertEqual(logs.output, [])
+            b''.join(response.streaming_content)
+        self.assertEqual(response['X-DB-Query-Count'], '0')
+        self.assertIn(': 1 queries', logs.output[0])
@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from recipes.models import Ingredient, Tag
+from rest_framework.test import APIClient
+from tests.utils import create_user, image_data
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeCreateValidationTests(TestCase):
+    """Ошибки ингредиентов и тегов возвращаются под своими полями"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('author')
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.ingredient = Ingredient.objects.create(
+            name='Овсянка', measurement_unit='г'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, tags=None, ingredients=None):
+        return self.client.post('/api/recipes/', {
+            'name': 'Каша', 'text': 'Описание', 'cooking_time': 10,
+            'image': image_data(),
+            'tags': tags or [self.tag.id],
+            'ingredients': ingredients or [
+                {'id': self.ingredient.id, 'amount': 100}
+            ],
+        }, format='json')
+
+    def test_amount_out_of_range(self):
+        for amount in (0, 2 ** 31):
+            with self.subTest(amount=amount):
+                response = self.create(ingredients=[
+                    {'id': self.ingredient.id, 'amount': amount}
+                ])
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('amount', response.data['ingredients'][0])
+
+    def test_id_out_of_range(self):
+        response = self.create(tags=[2 ** 63])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.data)
+
+    def test_missing_tag(self):
+        response = self.create(tags=[self.tag.id, self.tag.id + 1])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), ['tags'])
+
+    def test_missing_ingredient(self):
+        response = self.create(ingredients=[
+            {'id': self.ingredient.id, 'amount': 100},
+            {'id': self.ingredient.id + 1, 'amount': 100},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['ingredients'][0], {})
+        self.assertIn('id', response.data['ingredients'][1])
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from backend_foodgram.routers import (PIN_KEY, REPLICA, RequestRouting,
+                                      check_shared_cache)
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import (AsyncClient, RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+CACHE_DIR = tempfile.mkdtemp()
+SHARED_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    }
+}
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+class RequestRoutingTests(SimpleTestCase):
+    """Выбор базы для чтений в рамках запроса"""
+
+    def test_unsafe_requests_read_from_primary(self):
+        request = RequestFactory().post('/api/recipes/')
+        self.assertIsNone(RequestRouting(request).db_for_read())
+
+    def test_anonymous_reads_go_to_replica(self):
+        request = RequestFactory().get('/api/recipes/')
+        self.assertEqual(RequestRouting(request).db_for_read(), REPLICA)
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_replica_requires_shared_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            check_shared_cache()
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache(self):
+        check_shared_cache()
+
+
+@skipUnless(REPLICA in settings.DATABASES, 'реплика не настроена')
+@override_settings(CACHES=SHARED_CACHE)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Чтения GET-запросов идут на реплику, а после записи пользователь
+    читает с основной базы. В тестах реплика зеркалит основную базу
+    через отдельное соединение, поэтому данные коммитятся
+    """
+    databases = '__all__'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('reader')
+        self.recipe = create_recipe(self.user)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def count_queries(self, method, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(self.client, method)(url)
+        self.assertLess(response.status_code, 400)
+        return len(primary.captured_queries), len(replica.captured_queries)
+
+    def test_reads_use_replica_until_write(self):
+        primary, replica = self.count_queries('get', '/api/recipes/')
+        self.assertGreater(replica, 0)
+        # Токен читается с основной базы, остальное с реплики
+        self.assertEqual(primary, 1)
+
+        primary, replica = self.count_queries(
+            'post', f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(replica, 0)
+
+        primary, replica = self.count_queries('get', '/api/recipes/')
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    @override_settings(ROOT_URLCONF='tests.async_urls')
+    def test_async_write_pins_user(self):
+        async def post():
+            return await AsyncClient().post(
+                f'/api/recipes/{self.recipe.id}/favorite/',
+                headers={'Authorization': f'Token {self.token}'}
+            )
+
+        self.assertEqual(async_to_sync(post)().status_code, 201)
+        self.assertTrue(cache.get(PIN_KEY.format(self.user.id)))
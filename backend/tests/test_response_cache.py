@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.test import TestCase
+from recipes.models import Ingredient, IngredientRecipe, Tag, TagRecipe
+from recipes.response_cache import GLOBAL, LIST, get_versions
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+
+class AuthorVersionTests(TestCase):
+    """Сохранение пользователя сбрасывает кэш только для авторов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.reader = create_user('reader')
+        create_recipe(cls.author)
+
+    def assertBumps(self, user, bumped, **kwargs):
+        before = get_versions(GLOBAL)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(**kwargs)
+        self.assertEqual(get_versions(GLOBAL) != before, bumped)
+
+    def test_author_profile_change(self):
+        self.author.first_name = 'Имя'
+        self.assertBumps(self.author, True)
+
+    def test_password_change(self):
+        self.author.set_password('new')
+        self.assertBumps(self.author, False, update_fields=['password'])
+
+    def test_user_without_recipes(self):
+        self.reader.first_name = 'Имя'
+        self.assertBumps(self.reader, False)
+
+
+class RecipeVersionTests(TestCase):
+    """Изменение рецепта меняет его версию один раз"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.recipe = create_recipe(cls.author)
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=cls.recipe, tag=tag) for tag in cls.tags
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=cls.recipe, ingredient=ingredient,
+                             amount=1)
+            for ingredient in cls.ingredients
+        )
+
+    def test_update_bumps_once(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with mock.patch('recipes.signals.bump_versions') as bump:
+            response = client.patch(
+                f'/api/recipes/{self.recipe.id}/', {
+                    'name': 'Новое название',
+                    'tags': [self.tags[0].id],
+                    'ingredients': [
+                        {'id': self.ingredients[0].id, 'amount': 5}
+                    ],
+                }, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        bump.assert_called_once_with(LIST, self.recipe.id)
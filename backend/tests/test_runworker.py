@@ -0,0 +1,56 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
+from jobs.management.commands.runworker import Command
+
+COMMAND = 'jobs.management.commands.runworker'
+
+
+class RunWorkerTests(TransactionTestCase):
+    """Ошибка базы не останавливает поток обработчика"""
+
+    @mock.patch(f'{COMMAND}.signal.signal')
+    @mock.patch(f'{COMMAND}.claim')
+    def test_database_error_is_retried(self, claim, _signal):
+        claim.side_effect = [OperationalError('connection lost'), None]
+        stderr = StringIO()
+        call_command(
+            'runworker', '--burst', '--threads=1', '--poll-interval=0',
+            stdout=StringIO(), stderr=stderr
+        )
+        self.assertEqual(claim.call_count, 2)
+        self.assertIn('connection lost', stderr.getvalue())
+
+    def run_idle(self, claim, polls, poll_interval):
+        """Запускает обработчик на пустой очереди до polls опросов"""
+        command = Command()
+
+        def idle(worker):
+            if claim.call_count >= polls:
+                command.stop.set()
+
+        claim.side_effect = idle
+        call_command(
+            command, '--threads=2', f'--poll-interval={poll_interval}',
+            stdout=StringIO(), stderr=StringIO()
+        )
+
+    @mock.patch(f'{COMMAND}.signal.signal')
+    @mock.patch(f'{COMMAND}.release_stale')
+    @mock.patch(f'{COMMAND}.claim')
+    def test_idle_polls_do_not_release_stale(self, claim, release_stale,
+                                             _signal):
+        self.run_idle(claim, polls=20, poll_interval=0)
+        release_stale.assert_called_once_with()
+
+    @override_settings(JOB_TIMEOUT=0)
+    @mock.patch(f'{COMMAND}.signal.signal')
+    @mock.patch(f'{COMMAND}.release_stale')
+    @mock.patch(f'{COMMAND}.claim')
+    def test_stale_jobs_released_on_timer(self, claim, release_stale,
+                                          _signal):
+        self.run_idle(claim, polls=8, poll_interval=0.3)
+        self.assertGreater(release_stale.call_count, 1)
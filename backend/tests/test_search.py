@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test import TestCase
+from recipes.models import Recipe
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+URL = '/api/recipes/'
+
+
+def trigram_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT word_similarity('борш', 'борщ') > 0")
+        return cursor.fetchone()[0]
+
+
+class RecipeSearchTests(TestCase):
+    """Полнотекстовый поиск с ранжированием и пагинация результатов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.soup = create_recipe(
+            author, 'Борщ', text='Борщ со свеклой и капустой'
+        )
+        cls.green = create_recipe(author, 'Борщ зеленый', text='Со щавелем')
+        cls.side = create_recipe(
+            author, 'Пампушки', text='Подаются к борщу с чесноком'
+        )
+        create_recipe(author, 'Щи', text='Кислая капуста')
+
+    def search(self, value, **params):
+        response = APIClient().get(URL, {'search': value, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, data):
+        return [recipe['id'] for recipe in data['results']]
+
+    def test_search_vector_is_filled(self):
+        self.assertTrue(
+            Recipe.objects.filter(pk=self.soup.pk)
+            .exclude(search_vector=None).exists()
+        )
+
+    def test_ranking(self):
+        # Совпадение в названии весит больше, чем в описании
+        data = self.search('борщ')
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(
+            self.ids(data), [self.soup.id, self.green.id, self.side.id]
+        )
+
+    def test_russian_stemming(self):
+        self.assertEqual(
+            set(self.ids(self.search('борщи'))),
+            {self.soup.id, self.green.id, self.side.id}
+        )
+        self.assertEqual(self.ids(self.search('щавеля')), [self.green.id])
+
+    def test_no_match(self):
+        data = self.search('пицца')
+        self.assertEqual((data['count'], data['results']), (0, []))
+
+    def test_limit_offset_keeps_ranking(self):
+        # С поиском курсорный режим не включается: порядок по релевантности
+        first = self.search('борщ', pagination='cursor', limit=2)
+        self.assertEqual(first['count'], 3)
+        self.assertEqual(self.ids(first), [self.soup.id, self.green.id])
+        self.assertIn('offset=2', first['next'])
+        second = self.search('борщ', limit=2, offset=2)
+        self.assertEqual(self.ids(second), [self.side.id])
+        self.assertIsNone(second['next'])
+
+    def test_typo_uses_trigrams(self):
+        if not trigram_available():
+            self.skipTest('pg_trgm недоступен')
+        self.assertEqual(self.ids(self.search('помпушки')), [self.side.id])
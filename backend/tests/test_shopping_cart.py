@@ -0,0 +1,85 @@
+import csv
+import json
+
+from django.test import TestCase
+from recipes.models import Ingredient, IngredientRecipe, ShoppingCart
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class DownloadShoppingCartTests(TestCase):
+    """Выгрузка списка покупок в txt, csv и json"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        sauce = Ingredient.objects.create(
+            name='соус "Чили", острый', measurement_unit='мл'
+        )
+        for name, amounts in (('Суп', (5, 30)), ('Рагу', (7, 20))):
+            recipe = create_recipe(cls.user, name=name)
+            IngredientRecipe.objects.bulk_create([
+                IngredientRecipe(recipe=recipe, ingredient=salt,
+                                 amount=amounts[0]),
+                IngredientRecipe(recipe=recipe, ingredient=sauce,
+                                 amount=amounts[1]),
+            ])
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        # Чужой список покупок в выгрузку не попадает
+        other = create_user('other')
+        ShoppingCart.objects.create(user=other, recipe=recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, file_format, content_type):
+        response = self.client.get(URL, {'format': file_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], content_type)
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="shopping_cart.{file_format}"'
+        )
+        return b''.join(response.streaming_content).decode()
+
+    def test_txt(self):
+        content = self.download('txt', 'text/plain; charset=utf-8')
+        self.assertEqual(
+            content, 'соль: 12 г\nсоус "Чили", острый: 50 мл\n'
+        )
+
+    def test_txt_is_default(self):
+        response = self.client.get(URL)
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+
+    def test_csv(self):
+        content = self.download('csv', 'text/csv; charset=utf-8')
+        self.assertIn('"соус ""Чили"", острый",50,мл', content)
+        self.assertEqual(list(csv.reader(content.splitlines())), [
+            ['Ингредиент', 'Количество', 'Единица измерения'],
+            ['соль', '12', 'г'],
+            ['соус "Чили", острый', '50', 'мл'],
+        ])
+
+    def test_json(self):
+        content = self.download('json', 'application/json')
+        self.assertEqual(json.loads(content), [
+            {'name': 'соль', 'amount': 12, 'measurement_unit': 'г'},
+            {'name': 'соус "Чили", острый', 'amount': 50,
+             'measurement_unit': 'мл'},
+        ])
+
+    def test_empty_json(self):
+        self.client.force_authenticate(create_user('empty'))
+        self.assertEqual(
+            json.loads(self.download('json', 'application/json')), []
+        )
+
+    def test_unknown_format(self):
+        response = self.client.get(URL, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
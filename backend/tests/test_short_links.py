@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from recipes.models import Recipe
+from recipes.short_links import LENGTH, MODULUS, decode, encode, resolve_legacy
+from rest_framework.test import APIClient
+from tests.utils import create_recipe, create_user
+
+
+class ShortLinkCodeTests(SimpleTestCase):
+    """Кодирование id рецепта в короткую ссылку и обратно"""
+
+    def test_round_trip(self):
+        for recipe_id in (1, 2, 61, 62, 12345, MODULUS - 1):
+            with self.subTest(recipe_id=recipe_id):
+                code = encode(recipe_id)
+                self.assertEqual(len(code), LENGTH)
+                self.assertEqual(decode(code), recipe_id)
+
+    def test_neighbours_differ(self):
+        self.assertNotEqual(encode(1)[:3], encode(2)[:3])
+
+    def test_out_of_range(self):
+        for recipe_id in (0, MODULUS):
+            with self.subTest(recipe_id=recipe_id):
+                with self.assertRaises(ValueError):
+                    encode(recipe_id)
+
+    def test_not_a_code(self):
+        for code in ('abc', 'abcdefg', 'abc-ef', 'x' * 22, '000000'):
+            with self.subTest(code=code):
+                self.assertIsNone(decode(code))
+
+
+class ShortLinkViewTests(TestCase):
+    """Получение ссылки без записи и переход по ней"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = create_recipe(create_user('author'))
+        cls.legacy = create_recipe(
+            cls.recipe.author, 'Старый рецепт',
+            short_link='bWmNT9x6DdvGaLpyRkZ2Qc'
+        )
+
+    def setUp(self):
+        resolve_legacy.cache_clear()
+        self.client = APIClient()
+
+    def test_get_link_does_not_write(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'/api/recipes/{self.recipe.id}/get-link/'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['short-link'],
+            f'{settings.SHORT_LINK_HOST}/s/{encode(self.recipe.id)}/'
+        )
+        self.assertIsNone(Recipe.objects.get(pk=self.recipe.pk).short_link)
+
+    def test_redirect_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/s/{encode(self.recipe.id)}/')
+        self.assertRedirects(
+            response, f'/recipes/{self.recipe.id}',
+            fetch_redirect_response=False
+        )
+        self.assertIn(
+            f'max-age={settings.SHORT_LINK_MAX_AGE}',
+            response['Cache-Control']
+        )
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_legacy_link_is_cached(self):
+        url = f'/s/{self.legacy.short_link}/'
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertRedirects(
+            response, f'/recipes/{self.legacy.id}',
+            fetch_redirect_response=False
+        )
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_unknown_link(self):
+        self.assertEqual(
+            self.client.get('/s/unknown-legacy-link/').status_code, 404
+        )
@@ -0,0 +1,59 @@
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.links import remove_link
+from rest_framework.test import APIClient
+from tests.utils import create_user
+from users.models import Subscribe
+
+
+class SubscribeTests(TestCase):
+    """Подписка и отписка без лишних запросов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.author = create_user('author')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_subscribe_reads_author_once(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        user_reads = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "users_user"' in query['sql']
+        ]
+        self.assertEqual(len(user_reads), 1)
+        self.assertEqual(self.client.post(url).status_code, 400)
+
+    def test_self_subscription_is_rejected(self):
+        response = self.client.post(f'/api/users/{self.reader.id}/subscribe/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_remove_link_sends_deleted_row(self):
+        subscription = Subscribe.objects.create(
+            user=self.reader, following=self.author
+        )
+        received = []
+
+        def receiver(sender, instance, **kwargs):
+            received.append(instance.pk)
+
+        post_delete.connect(receiver, sender=Subscribe)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Subscribe)
+        self.assertTrue(remove_link(
+            Subscribe, user=self.reader, following_id=self.author.id
+        ))
+        self.assertFalse(remove_link(
+            Subscribe, user=self.reader, following_id=self.author.id
+        ))
+        self.assertEqual(received, [subscription.pk])
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
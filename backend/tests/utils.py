@@ -0,0 +1,33 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+from recipes.models import Recipe
+from users.models import User
+
+
+def image_data():
+    """Изображение 1x1 в формате data URI, как его присылает фронтенд"""
+    buffer = BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+def create_user(username='reader', **fields):
+    """Пользователь с email по имени и паролем pass"""
+    return User.objects.create_user(
+        email=f'{username}@example.com', username=username,
+        password='pass', **fields
+    )
+
+
+def create_recipe(author, name='Рецепт', **fields):
+    """Рецепт с уже загруженным изображением, без тегов и ингредиентов"""
+    fields = {
+        'text': 'Описание', 'cooking_time': 10,
+        'image': 'static/images/recipe.png', **fields
+    }
+    return Recipe.objects.create(author=author, name=name, **fields)
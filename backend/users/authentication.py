@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import SAFE_METHODS
+
+TOKEN_KEY = 'auth_token:{}'
+
+
+def get_token(key, cached=True):
+    """
+    Токен вместе с пользователем из кэша; при промахе или cached=False
+    читается из базы одним запросом и кэшируется
+    на AUTH_TOKEN_CACHE_TTL секунд
+    """
+    cache_key = TOKEN_KEY.format(key)
+    token = None
+    if cached and settings.AUTH_TOKEN_CACHE_TTL:
+        token = cache.get(cache_key)
+    if token is None:
+        token = Token.objects.select_related('user').filter(key=key).first()
+        if token is not None and settings.AUTH_TOKEN_CACHE_TTL:
+            cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TTL)
+    return token
+
+
+async def aget_token(key, cached=True):
+    cache_key = TOKEN_KEY.format(key)
+    token = None
+    if cached and settings.AUTH_TOKEN_CACHE_TTL:
+        token = await cache.aget(cache_key)
+    if token is None:
+        token = await Token.objects.select_related('user').filter(
+            key=key
+        ).afirst()
+        if token is not None and settings.AUTH_TOKEN_CACHE_TTL:
+            await cache.aset(cache_key, token, settings.AUTH_TOKEN_CACHE_TTL)
+    return token
+
+
+def forget_tokens(*keys):
+    """
+    Удаляет токены из кэша после коммита транзакции, чтобы
+    параллельный запрос не закэшировал старые данные заново
+    """
+    transaction.on_commit(lambda: cache.delete_many(
+        [TOKEN_KEY.format(key) for key in keys]
+    ))
+
+
+def forget_user_tokens(user_id):
+    forget_tokens(*Token.objects.filter(
+        user_id=user_id
+    ).values_list('key', flat=True))
+
+
+def check_token(token):
+    """Те же проверки и сообщения, что в TokenAuthentication"""
+    if token is None:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return token.user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication без запроса к базе на каждый вызов:
+    токен и пользователь берутся из кэша. Изменяющие запросы
+    читают пользователя из базы, чтобы не сохранить устаревшую копию
+    """
+
+    def authenticate(self, request):
+        self.cached = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        return check_token(get_token(key, cached=self.cached))
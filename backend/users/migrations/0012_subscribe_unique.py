@@ -0,0 +1,37 @@
+# Generated by Django 4.2.14 on 2026-10-18 04:50
+
+from django.db import migrations
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicates(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscribe = apps.get_model('users', 'Subscribe')
+    keep = Subscribe.objects.values('user', 'following').annotate(
+        keep_id=Min('id')
+    ).values('keep_id')
+    duplicates = Subscribe.objects.exclude(id__in=keep)
+    if not duplicates.exists():
+        return
+    duplicates._raw_delete(schema_editor.connection.alias)
+    User.objects.update(followers_count=Coalesce(Subquery(
+        Subscribe.objects.filter(following=OuterRef('pk')).order_by().values(
+            'following'
+        ).annotate(count=Count('pk')).values('count')
+    ), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='subscribe',
+            unique_together={('user', 'following')},
+        ),
+    ]
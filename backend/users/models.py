@@ -1,14 +1,17 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from recipes.counters import CounterFieldsMixin
 from users.validators import username_not_me, username_validator
 
 LENG_EMAIL = 254
 LENG_USER = 150
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Класс, описывающий кастомную модель пользователя"""
 
+    counter_fields = ('recipes_count', 'followers_count')
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
@@ -31,6 +34,16 @@ class User(AbstractUser):
         upload_to='static/avatars/',
         null=True
     )
+    avatar_variants = models.JSONField(
+        'Уменьшенные копии аватара',
+        default=dict, blank=True, editable=False
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -57,6 +70,7 @@ class Subscribe(models.Model):
     class Meta:
         verbose_name = 'Подписки'
         verbose_name_plural = 'Подписки'
+        unique_together = ('user', 'following')
 
     def __str__(self):
         return f'{self.user.email} подписан на {self.following.email}'
@@ -1,17 +1,25 @@
-from recipes.serializers import Base64ImageField, RecipeSubscribeSerializer
+from django.conf import settings
+from recipes.links import add_link
+from recipes.serializers import (Base64ImageField, ImageVariantsField,
+                                 RecipeSubscribeSerializer)
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from users.models import LENG_EMAIL, LENG_USER, Subscribe, User
 from users.validators import username_not_me, username_validator
 
 
 class UserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_srcset = ImageVariantsField(
+        'avatar', 'avatar_variants', settings.AVATAR_IMAGE_SIZES
+    )
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'username',
-            'first_name', 'last_name', 'avatar', 'is_subscribed'
+            'first_name', 'last_name', 'avatar', 'avatar_srcset',
+            'is_subscribed'
         )
 
     def get_is_subscribed(self, obj):
@@ -91,6 +99,11 @@ class AvatarSerializer(serializers.ModelSerializer):
         model = User
         fields = ['avatar']
 
+    def update(self, instance, validated_data):
+        instance.avatar = validated_data.get('avatar', instance.avatar)
+        instance.save(update_fields=['avatar'])
+        return instance
+
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     """
@@ -101,16 +114,21 @@ class SubscriptionSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
+    avatar_srcset = ImageVariantsField(
+        'avatar', 'avatar_variants', settings.AVATAR_IMAGE_SIZES
+    )
 
     class Meta:
         model = User
         fields = (
             'id', 'username', 'first_name',
             'last_name', 'email', 'is_subscribed',
-            'recipes_count', 'recipes', 'avatar'
+            'recipes_count', 'recipes', 'avatar', 'avatar_srcset'
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Subscribe.objects.filter(
@@ -119,9 +137,13 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return False
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'limited_recipes'):
+            return RecipeSubscribeSerializer(
+                obj.limited_recipes, many=True, context=self.context
+            ).data
         recipes_limit = self.context['request'].query_params.get(
             'recipes_limit'
         )
@@ -133,36 +155,46 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         ).data
 
 
+class ContextDefault:
+    """
+    Значение по умолчанию из контекста сериализатора: объект,
+    уже загруженный представлением, не читается из базы повторно
+    """
+    requires_context = True
+
+    def __init__(self, key):
+        self.key = key
+
+    def __call__(self, serializer_field):
+        return serializer_field.context[self.key]
+
+
 class SubscribeSerializer(serializers.ModelSerializer):
     """
     Класс, описывающий сериализатор для модели подписки на других пользователей
     """
-    user = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all(),
-        default=serializers.CurrentUserDefault()
-    )
-    following = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all()
-    )
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    following = serializers.HiddenField(default=ContextDefault('following'))
 
     class Meta:
         model = Subscribe
         fields = '__all__'
+        # Уникальность проверяет сама вставка в create()
+        validators = []
 
     def validate(self, data):
         current_user = self.context['request'].user
         following = data['following']
         if current_user == following:
             raise serializers.ValidationError("Нельзя подписаться на себя.")
-        if Subscribe.objects.filter(
-            user=current_user,
-            following=following
-        ).exists():
-            raise serializers.ValidationError(
-                "Вы уже подписаны на этого пользователя."
-            )
         return data
 
     def create(self, validated_data):
-        validated_data['user'] = self.context['request'].user
-        return Subscribe.objects.create(**validated_data)
+        subscription = add_link(Subscribe, **validated_data)
+        if subscription is None:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    "Вы уже подписаны на этого пользователя."
+                ]
+            })
+        return subscription
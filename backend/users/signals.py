@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from recipes.counters import change_counters, track_counter
+from recipes.images import schedule_variants
+from rest_framework.authtoken.models import Token
+from users.authentication import forget_tokens, forget_user_tokens
+from users.models import Subscribe, User
+
+track_counter(
+    Subscribe, 'following', User, 'followers_count', released_by=(User,)
+)
+
+
+@receiver(pre_delete, sender=User)
+def release_followers_counters(sender, instance, **kwargs):
+    """Удаляемый пользователь перестает быть подписчиком одним UPDATE"""
+    change_counters(Subscribe, Subscribe.objects.filter(
+        user=instance
+    ).exclude(following=instance).only('following_id'), -1)
+
+
+@receiver(post_save, sender=User)
+def generate_avatar_variants(sender, instance, **kwargs):
+    schedule_variants(
+        instance, 'avatar', 'avatar_variants', settings.AVATAR_IMAGE_SIZES
+    )
+
+
+@receiver(post_save, sender=User)
+def forget_cached_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Смена пароля, деактивация и правка профиля сбрасывают кэш токенов,
+    чтобы request.user не отставал от базы
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    forget_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Выход через djoser удаляет токен, а с ним и запись в кэше"""
+    forget_tokens(instance.key)
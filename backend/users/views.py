@@ -1,6 +1,9 @@
-from django.db.models import Count
+from django.db.models import F, Prefetch, Value, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from djoser.serializers import SetPasswordSerializer
+from recipes.links import remove_link
+from recipes.models import Recipe
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
@@ -38,7 +41,8 @@ class AvatarView(APIView):
 
     def delete(self, request, *args, **kwargs):
         user = request.user
-        user.avatar.delete()
+        user.avatar.delete(save=False)
+        user.save(update_fields=['avatar'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -47,17 +51,10 @@ class SubscribeUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, id):
-        user = request.user
         following = get_object_or_404(User, id=id)
-
-        data = {
-            'user': user.id,
-            'following': following.id
-        }
-
         serializer = SubscribeSerializer(
-            data=data,
-            context={'request': request}
+            data={},
+            context={'request': request, 'following': following}
         )
         if serializer.is_valid():
             serializer.save()
@@ -71,19 +68,12 @@ class SubscribeUserView(APIView):
 
     def delete(self, request, id):
         user = request.user
-        following = get_object_or_404(User, id=id)
-
-        if not Subscribe.objects.filter(
-            user=user, following=following
-        ).exists():
+        if not remove_link(Subscribe, user=user, following_id=id):
+            get_object_or_404(User.objects.only('id'), id=id)
             return Response(
                 {"detail": "Этого пользователя нет в подписках"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        subscription = get_object_or_404(
-            Subscribe, user=user, following=following
-        )
-        subscription.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -92,14 +82,38 @@ class SubscribeViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     pagination_class = LimitOffsetPagination
 
+    def get_recipes_limit(self, request):
+        try:
+            recipes_limit = int(request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            return None
+        return max(recipes_limit, 0)
+
+    def get_queryset(self, request):
+        """
+        Авторы из подписок с первыми recipes_limit рецептами
+        каждого автора, которые выбираются оконной функцией
+        """
+        recipes = Recipe.objects.all()
+        recipes_limit = self.get_recipes_limit(request)
+        if recipes_limit is not None:
+            recipes = recipes.annotate(row_number=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('name'), F('id')),
+            )).filter(row_number__lte=recipes_limit)
+        return User.objects.filter(followers__user=request.user).annotate(
+            is_subscribed=Value(True),
+        ).prefetch_related(Prefetch(
+            'recipes', queryset=recipes.order_by('name', 'id'),
+            to_attr='limited_recipes'
+        ))
+
     def list(self, request):
-        user = request.user
-        follows = Subscribe.objects.filter(user=user)
-        followed_users = [
-            follow.following for follow in follows
-        ]
         paginator = self.pagination_class()
-        paginated_users = paginator.paginate_queryset(followed_users, request)
+        paginated_users = paginator.paginate_queryset(
+            self.get_queryset(request), request
+        )
 
         serializer = SubscriptionSerializer(
             paginated_users, many=True, context={'request': request}
@@ -119,7 +133,7 @@ class UserViewSet(viewsets.ModelViewSet):
         return UserCreateSerializer
 
     def get_queryset(self):
-        queryset = User.objects.annotate(Count('recipes'))
+        queryset = User.objects.all()
         return queryset
 
     @action(
@@ -134,7 +148,7 @@ class UserViewSet(viewsets.ModelViewSet):
         )
         if serializer.is_valid():
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            user.save(update_fields=['password'])
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 